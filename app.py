@@ -1,7 +1,10 @@
+import time
+STARTUP_START = time.perf_counter()
+
 from flask import Flask, render_template, Response, jsonify, request
 import cv2
 import threading
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import json
 import os
 import sys
@@ -11,17 +14,39 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.append(current_dir)
 
-from visiosense import main as visiosense_main
+from visiosense import main as visiosense_main, models, settings, DEFAULT_SETTINGS, validate_settings
+from runtime_config import RuntimeConfig
+from frame_bus import FrameBus, CameraPublisher
+from streaming import MJPEGBroadcaster, SocketIOFrameStreamer, DEFAULT_QUALITY
+from whiteboard import Whiteboard
+from status_events import StatusPublisher
+from frame_sources import parse_synthetic_spec
+from sessions import SessionManager
+import metrics
 
 app = Flask(__name__, 
     template_folder=os.path.join(current_dir, 'templates'),
     static_folder=os.path.join(current_dir, 'static'))
 socketio = SocketIO(app)
+# POST /sessions may only open camera indices, "synthetic" sources and media
+# under MEDIA_ROOT, and only drives the real mouse/keyboard when the operator
+# sets VISIOSENSE_ALLOW_SESSION_INPUT=1
+app.config['MEDIA_ROOT'] = os.path.realpath(
+    os.environ.get('VISIOSENSE_MEDIA_ROOT', os.path.join(current_dir, 'media')))
+app.config['ALLOW_SESSION_INPUT'] = os.environ.get('VISIOSENSE_ALLOW_SESSION_INPUT') == '1'
+# /start runs the engine as a thread of this server, so YOLO gets a worker
+# process by default instead of competing with request handling for the GIL
+settings.update({"objects": {"processes": 1}})
 
 # Global variables
+frame_bus = None
+broadcaster = None
+ws_streamer = None
 camera = None
 camera_thread = None
 running = False
+# Kept across start/stop so the drawing survives restarts
+whiteboard = Whiteboard()
 
 @app.route('/')
 def index():
@@ -219,6 +244,7 @@ def index():
             }
         </style>
         <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+        <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.1/socket.io.js"></script>
     </head>
     <body>
         <div class="container">
@@ -235,6 +261,7 @@ def index():
                     <div id="camera-feed"></div>
                     <div class="fps-overlay">
                         FPS: <span id="fpsCounter">0</span> | Resolution: <span id="resolution">-</span>
+                        | Latency: <span id="latency">-</span> ms
                     </div>
                     <div class="controls">
                         <button class="btn btn-start" onclick="startCamera()">
@@ -310,6 +337,8 @@ def index():
 
         <script>
             let isRunning = false;
+            // ?stream=ws streams binary frames over Socket.IO instead of MJPEG
+            const streamMode = new URLSearchParams(window.location.search).get('stream') === 'ws' ? 'ws' : 'mjpeg';
             
             function startCamera() {
                 if (!isRunning) {
@@ -319,7 +348,12 @@ def index():
                             if (data.status === 'success') {
                                 isRunning = true;
                                 const feed = document.getElementById('camera-feed');
-                                feed.innerHTML = '<img src="/video_feed">';
+                                if (streamMode === 'ws') {
+                                    feed.innerHTML = '<img>';
+                                    socket.emit('video_subscribe', { format: 'jpeg', quality: 80, credits: 2 });
+                                } else {
+                                    feed.innerHTML = '<img src="/video_feed">';
+                                }
                                 document.querySelector('.btn-start').disabled = true;
                                 document.querySelector('.btn-stop').disabled = false;
                             }
@@ -373,41 +407,110 @@ def index():
             
             // Optional: WebSocket connection for real-time updates
             const socket = io();
+            // Status events only contain the fields that changed
+            const statusFields = {
+                mode: 'currentMode', gesture: 'currentGesture', fingers: 'fingerCount',
+                fps: 'fpsCounter', resolution: 'resolution'
+            };
             socket.on('status_update', function(data) {
-                document.getElementById('currentMode').textContent = data.mode;
-                document.getElementById('currentGesture').textContent = data.gesture;
-                document.getElementById('fingerCount').textContent = data.fingers;
+                for (const [field, id] of Object.entries(statusFields)) {
+                    if (field in data) {
+                        document.getElementById(id).textContent = data[field];
+                    }
+                }
+            });
+            
+            // Binary frames: decode one at a time, then return its credit with the measured latency.
+            // Only the newest frame waits for the decoder; every frame that is skipped is acked too.
+            let frameUrl = null;
+            let decoding = false;
+            let pendingFrame = null;
+            function showFrame(msg) {
+                const img = document.querySelector('#camera-feed img');
+                if (!img) {
+                    socket.emit('video_ack', { seq: msg.seq });
+                    return;
+                }
+                decoding = true;
+                const url = URL.createObjectURL(new Blob([msg.frame], { type: 'image/' + msg.format }));
+                function done(ack) {
+                    decoding = false;
+                    socket.emit('video_ack', ack);
+                    if (pendingFrame) {
+                        const next = pendingFrame;
+                        pendingFrame = null;
+                        showFrame(next);
+                    }
+                }
+                img.onload = function() {
+                    if (frameUrl) URL.revokeObjectURL(frameUrl);
+                    frameUrl = url;
+                    const latency = Date.now() / 1000 - msg.timestamp;
+                    document.getElementById('latency').textContent = Math.round(latency * 1000);
+                    done({ seq: msg.seq, latency: latency });
+                };
+                // A frame that fails to decode still returns its credit, or the stream stalls
+                img.onerror = function() {
+                    URL.revokeObjectURL(url);
+                    done({ seq: msg.seq });
+                };
+                img.src = url;
+            }
+            socket.on('video_frame', function(msg) {
+                if (!decoding) {
+                    showFrame(msg);
+                    return;
+                }
+                if (pendingFrame) socket.emit('video_ack', { seq: pendingFrame.seq });
+                pendingFrame = msg;
             });
         </script>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.1/socket.io.js"></script>
     </body>
     </html>
     '''
 
-def gen_frames():
-    global running
-    while running:
-        if camera:
-            success, frame = camera.read()
-            if success:
-                ret, buffer = cv2.imencode('.jpg', frame)
-                if ret:
-                    frame = buffer.tobytes()
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+def stream_params():
+    """Read quality/scale/fps stream parameters from the query string."""
+    quality = min(max(request.args.get('quality', DEFAULT_QUALITY, type=int), 10), 100)
+    scale = min(max(request.args.get('scale', 1.0, type=float), 0.1), 1.0)
+    max_fps = request.args.get('fps', None, type=float)
+    return quality, scale, max_fps
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(gen_frames(),
+    if broadcaster is None or not broadcaster.running:
+        return jsonify({"status": "not running"}), 503
+    quality, scale, max_fps = stream_params()
+    return Response(broadcaster.stream(quality, scale, max_fps),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/snapshot.jpg')
+def snapshot():
+    jpeg = broadcaster.snapshot(*stream_params()[:2]) if broadcaster else None
+    if jpeg is None:
+        return jsonify({"status": "no frame available"}), 503
+    return Response(jpeg, mimetype='image/jpeg', headers={'Cache-Control': 'no-cache'})
+
 @app.route('/start', methods=['POST'])
 def start():
-    global camera, camera_thread, running
+    global frame_bus, broadcaster, ws_streamer, camera, camera_thread, running
     if not running:
+        # One capture owner feeds both the gesture engine and the stream
+        frame_bus = FrameBus()
+        camera = CameraPublisher(frame_bus, device=0, config=settings)
+        if not camera.start():
+            camera = None
+            frame_bus.close()
+            frame_bus = None
+            return jsonify({"status": "error", "message": "Camera not found or not accessible"})
+        broadcaster = MJPEGBroadcaster(frame_bus, topic="annotated")
+        ws_streamer = SocketIOFrameStreamer(socketio, frame_bus, topic="annotated")
         running = True
-        camera = cv2.VideoCapture(0)
-        camera_thread = threading.Thread(target=visiosense_main)
+        status_publisher.update(running=True)
+        camera_thread = threading.Thread(target=visiosense_main,
+                                         kwargs={"web_mode": True, "frame_bus": frame_bus,
+                                                 "headless": True, "whiteboard": whiteboard,
+                                                 "on_result": status_publisher.on_result})
         camera_thread.start()
         return jsonify({"status": "success"})
     return jsonify({"status": "already running"})
@@ -418,38 +521,255 @@ def stop():
     if running:
         running = False
         if camera:
-            camera.release()
+            camera.stop()
             camera = None
+        if frame_bus:
+            frame_bus.close()
+        if broadcaster:
+            broadcaster.stop()
+        if ws_streamer:
+            ws_streamer.stop()
+        status_publisher.update(running=False, fps=0)
         return jsonify({"status": "success"})
     return jsonify({"status": "not running"})
 
+def export_size():
+    """Requested export size; the height defaults to the drawing's aspect ratio."""
+    width = min(max(request.args.get('width', 1920, type=int), 16), 7680)
+    height = request.args.get('height', type=int) or round(width / whiteboard.aspect)
+    return width, min(max(height, 16), 4320)
+
+@app.route('/whiteboard.png')
+def whiteboard_png():
+    ok, buffer = cv2.imencode('.png', whiteboard.render(*export_size()))
+    if not ok:
+        return jsonify({"status": "error"}), 500
+    return Response(buffer.tobytes(), mimetype='image/png')
+
+@app.route('/whiteboard.svg')
+def whiteboard_svg():
+    return Response(whiteboard.to_svg(*export_size()), mimetype='image/svg+xml')
+
+@app.route('/whiteboard/<action>', methods=['POST'])
+def whiteboard_action(action):
+    if action not in ('undo', 'redo', 'clear'):
+        return jsonify({"status": "error", "message": f"Unknown action: {action}"}), 404
+    getattr(whiteboard, action)()
+    return jsonify({"status": "success", "strokes": len(whiteboard.store)})
+
 @app.route('/minimize', methods=['POST'])
 def minimize():
-    cv2.setWindowProperty("VisioSense - Hand Gesture Control", 
-                         cv2.WND_PROP_FULLSCREEN, 
-                         cv2.WINDOW_MINIMIZED)
+    # The engine runs headless under the web UI, so there may be no window
+    try:
+        cv2.setWindowProperty("VisioSense - Hand Gesture Control", 
+                             cv2.WND_PROP_FULLSCREEN, 
+                             cv2.WINDOW_MINIMIZED)
+    except cv2.error:
+        return jsonify({"status": "no window"})
     return jsonify({"status": "success"})
 
+def slider_value(value):
+    """Map a 0-100 dashboard slider to 0-1."""
+    return min(max(float(value) / 100.0, 0.0), 1.0)
+
+# Settings that open files on the server stay with the operator (command line),
+# and clients may only pick recognizers that keep audio on this machine
+OPERATOR_SETTINGS = {"voice": ("model", "source")}
+WEB_VOICE_BACKENDS = ("auto", "vosk", "sphinx")
+
+def check_web_settings(changes):
+    """Reject settings changes that web clients may not make."""
+    for section, keys in OPERATOR_SETTINGS.items():
+        for key in keys:
+            if key in changes.get(section, {}):
+                raise ValueError(f"{section}.{key} can't be changed from the web interface")
+    backend = changes.get('voice', {}).get('backend')
+    if backend is not None and backend not in WEB_VOICE_BACKENDS:
+        raise ValueError(f"voice.backend must be one of {', '.join(WEB_VOICE_BACKENDS)}")
+
+def settings_changes(data):
+    """Translate a dashboard settings request into RuntimeConfig changes."""
+    changes = {}
+    # Dashboard controls
+    if 'smoothing' in data:
+        changes.setdefault('cursor', {})['smoothing'] = slider_value(data['smoothing'])
+    if 'sensitivity' in data:
+        changes.setdefault('gestures', {})['sensitivity'] = slider_value(data['sensitivity'])
+    if 'drawingMode' in data:
+        changes.setdefault('drawing', {})['enabled'] = data['drawingMode']
+    # Any settings section can be changed directly, e.g. {"objects": {"interval": 0.2}}
+    for section, values in data.items():
+        if isinstance(values, dict):
+            changes.setdefault(section, {}).update(values)
+    check_web_settings(changes)
+    return changes
+
+def session_settings(data):
+    """Settings changes for a session, checked here so bad input fails the request."""
+    changes = settings_changes(data)
+    RuntimeConfig(DEFAULT_SETTINGS, validate=validate_settings).update(changes)
+    return changes
+
 @app.route('/update-settings', methods=['POST'])
 def update_settings():
-    settings = request.get_json()
-    # Update your visiosense settings here
+    try:
+        version = settings.update(settings_changes(request.get_json(silent=True) or {}))
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    # The running engine picks up the new version at its next frame
+    return jsonify({"status": "success", "version": version})
+
+@app.route('/settings')
+def get_settings():
+    version, values = settings.snapshot()
+    return jsonify({"version": version, "settings": values})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/models')
+def model_status():
+    return jsonify(models.status())
+
+@app.route('/sessions', methods=['GET'])
+def list_sessions():
+    return jsonify(session_manager.list())
+
+def session_source(source):
+    """Check a session source: camera index, "synthetic[:WxH]" or a path under MEDIA_ROOT."""
+    if isinstance(source, int) and not isinstance(source, bool) and source >= 0:
+        return source
+    if not isinstance(source, str):
+        raise ValueError(f"Invalid source: {source!r}")
+    if source.isdigit():
+        return int(source)
+    if source.startswith('synthetic'):
+        parse_synthetic_spec(source)
+        return source
+    root = app.config['MEDIA_ROOT']
+    path = os.path.realpath(os.path.join(root, source))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Source must be a camera index, 'synthetic' or a file under {root}")
+    return path
+
+@app.route('/sessions', methods=['POST'])
+def start_session():
+    """Start a pipeline: {"source": 1 | "clip.mp4" | "frames/" | "synthetic", "settings": {...}}
+
+    File sources are resolved relative to MEDIA_ROOT.
+    """
+    data = request.get_json(silent=True) or {}
+    input_backend = data.get('input', 'null')
+    if input_backend != 'null' and not app.config['ALLOW_SESSION_INPUT']:
+        return jsonify({"status": "error",
+                        "message": "Session input is disabled (set VISIOSENSE_ALLOW_SESSION_INPUT=1)"}), 403
+    try:
+        source = session_source(data.get('source', 0))
+        changes = session_settings(data.get('settings') or {})
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    try:
+        session = session_manager.start(source, changes, input_backend=input_backend,
+                                        session_id=data.get('id'))
+    except (RuntimeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+    return jsonify({"status": "success", "session": session.info()})
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def stop_session(session_id):
+    if not session_manager.stop(session_id):
+        return jsonify({"status": "error", "message": f"Unknown session: {session_id}"}), 404
     return jsonify({"status": "success"})
 
+@app.route('/sessions/<session_id>/settings', methods=['POST'])
+def update_session_settings(session_id):
+    session = session_manager.get(session_id)
+    if session is None:
+        return jsonify({"status": "error", "message": f"Unknown session: {session_id}"}), 404
+    try:
+        session.update_settings(session_settings(request.get_json(silent=True) or {}))
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "success"})
+
+@app.route('/video_feed/<session_id>')
+def session_video_feed(session_id):
+    session = session_manager.get(session_id)
+    if session is None or not session.broadcaster.running:
+        return jsonify({"status": "not running"}), 503
+    quality, scale, max_fps = stream_params()
+    return Response(session.broadcaster.stream(quality, scale, max_fps),
+                    mimetype='multipart/x-mixed-replace; boundary=frame')
+
 @socketio.on('connect')
 def handle_connect():
     print('Client connected')
+    # Late joiners get the full status once, then deltas like everyone else
+    emit('status_update', status_publisher.snapshot())
 
 @socketio.on('disconnect')
 def handle_disconnect():
     print('Client disconnected')
+    if ws_streamer:
+        ws_streamer.remove_client(request.sid)
+
+@socketio.on('video_subscribe')
+def video_subscribe(options=None):
+    """Stream binary frames to this client; options: format, quality, scale, credits."""
+    if ws_streamer is None or not ws_streamer.running:
+        return {"status": "not running"}
+    options = options or {}
+    try:
+        ws_streamer.add_client(
+            request.sid,
+            fmt=options.get('format', 'jpeg'),
+            quality=min(max(int(options.get('quality', DEFAULT_QUALITY)), 10), 100),
+            scale=min(max(float(options.get('scale', 1.0)), 0.1), 1.0),
+            credits=int(options.get('credits', 2))
+        )
+    except (ValueError, TypeError) as e:
+        return {"status": "error", "message": str(e)}
+    return {"status": "success"}
+
+@socketio.on('video_ack')
+def video_ack(data=None):
+    if ws_streamer:
+        data = data or {}
+        latency = data.get('latency')
+        ws_streamer.ack(request.sid, data.get('seq'),
+                        float(latency) if isinstance(latency, (int, float)) else None)
+
+@socketio.on('video_unsubscribe')
+def video_unsubscribe():
+    if ws_streamer:
+        ws_streamer.remove_client(request.sid)
+
+@socketio.on('session_subscribe')
+def session_subscribe(data=None):
+    """Join a session's status channel; replies with its full status."""
+    session = session_manager.get((data or {}).get('id'))
+    if session is None:
+        return {"status": "error", "message": "Unknown session"}
+    join_room(f"session:{session.id}")
+    return {"status": "success", "session": session.status_snapshot()}
+
+@socketio.on('session_unsubscribe')
+def session_unsubscribe(data=None):
+    leave_room(f"session:{(data or {}).get('id')}")
+
+def update_session_status(session_id, status):
+    """Send a session's status deltas to the clients watching it."""
+    socketio.emit('session_status', dict(status, session=session_id), to=f"session:{session_id}")
+
+def update_client_status(status):
+    """Broadcast changed status fields to every dashboard client."""
+    socketio.emit('status_update', status)
 
-def update_client_status(mode, gesture, fingers):
-    socketio.emit('status_update', {
-        'mode': mode,
-        'gesture': gesture,
-        'fingers': fingers
-    })
+# One batched, delta-compressed status event per tick for all viewers
+status_publisher = StatusPublisher(update_client_status, config=settings)
+# Extra cameras/sources, each in its own worker process
+session_manager = SessionManager(on_status=update_session_status)
 
 if __name__ == '__main__':
     # Ensure templates and static directories exist
@@ -460,5 +780,9 @@ if __name__ == '__main__':
     
     PORT = 5001
     print("Starting VisioSense Web Interface...")
+    # Load models in the background so the web UI comes up immediately
+    models.warm_up()
+    status_publisher.start()
+    print(f"✓ Web interface ready in {time.perf_counter() - STARTUP_START:.2f}s (models loading in background)")
     print(f"Open your web browser and go to: http://localhost:{PORT}")
     socketio.run(app, debug=True, host='0.0.0.0', port=PORT)
\ No newline at end of file
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+VisioSense - Batch Analysis
+==================================================
+
+Offline gesture/face/object analysis of recorded sessions.
+
+The video is split into fixed-size frame chunks that are processed by a
+multiprocessing pool. Every worker loads its own models and is limited to
+one inference thread, so throughput scales close to linearly with cores.
+MediaPipe Hands and FaceMesh are created fresh for every chunk, so results
+don't depend on how chunks were scheduled. Each finished chunk is written to a
+work directory first, which makes the run resumable after a crash: chunks
+that already have a result file are skipped. The work directory records
+the video and options it was made for; if they changed, its old chunks
+are discarded instead of being mixed into the new timeline.
+
+Usage:
+    python batch_analyze.py session.mp4 --output timeline.csv --workers 4
+    python batch_analyze.py session.mp4 --output timeline.parquet --resume
+
+The per-frame timeline contains the gesture, finger counts, head angle,
+facial expression and detected objects. Output format is chosen from the
+file extension: .csv, .jsonl or .parquet (requires pandas + pyarrow).
+"""
+
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from gestures import GestureStateMachine
+
+TIMELINE_FIELDS = ("frame", "time_s", "hands", "gesture", "stable_gesture", "fingers",
+                   "total_fingers", "finger_counts", "head_angle", "expression", "objects")
+
+# Per-process state, set up by _init_worker()
+_worker = {}
+
+
+def _init_worker(detect_objects_enabled):
+    """Load this worker's own models, limited to a single thread."""
+    cv2.setNumThreads(1)
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    import visiosense
+    mp = visiosense.models.get("mediapipe")
+    _worker["vs"] = visiosense
+    _worker["mp"] = mp
+    _worker["objects"] = detect_objects_enabled and visiosense.models.get("yolo") is not None
+
+
+def analyze_frame(frame, gesture_engine, timestamp):
+    """Analyze one frame and return its timeline row (without frame/time)."""
+    vs = _worker["vs"]
+    frame = cv2.flip(frame, 1)
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    row = dict.fromkeys(TIMELINE_FIELDS)
+    row.update(hands=0, fingers=0, total_fingers=0, finger_counts="", objects="[]")
+
+    hand_results = _worker["hands"].process(rgb)
+    if hand_results.multi_hand_landmarks:
+        multi_handedness = hand_results.multi_handedness
+        hand_array = vs.landmarks_to_array(hand_results.multi_hand_landmarks)
+        is_right = np.array([
+            (multi_handedness[i].classification[0].label if multi_handedness else "Right") == "Right"
+            for i in range(len(hand_array))
+        ])
+        counts, _, gestures = vs.classify_hands(hand_array, is_right)
+        gesture_engine.update(str(gestures[0]), timestamp)
+        row.update(hands=len(hand_array), gesture=str(gestures[0]),
+                   stable_gesture=gesture_engine.active, fingers=int(counts[0]),
+                   total_fingers=int(counts.sum()),
+                   finger_counts=",".join(str(c) for c in counts.tolist()))
+    else:
+        gesture_engine.update(None, timestamp)
+
+    face_results = _worker["face_mesh"].process(rgb)
+    if face_results.multi_face_landmarks:
+        face = vs.analyze_face(face_results.multi_face_landmarks[0].landmark)
+        row.update(head_angle=round(face["head_angle"], 2), expression=face["expression"])
+
+    if _worker["objects"]:
+        detections = vs.detect_objects(frame)
+        row["objects"] = json.dumps(vs.detections_to_dicts(detections))
+    return row
+
+
+def process_chunk(task):
+    """Analyze frames [start, end) of the video and write them to `path`."""
+    video, start, end, fps, path = task
+    mp = _worker["mp"]
+    cap = cv2.VideoCapture(video)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    # Tracking state and gesture smoothing restart at every chunk boundary, so
+    # a chunk's rows don't depend on which chunk its worker happened to run before
+    gesture_engine = GestureStateMachine(**_worker["vs"].GESTURE_SETTINGS)
+    rows = []
+    began = time.perf_counter()
+    with mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=2,
+                                  min_detection_confidence=0.7,
+                                  min_tracking_confidence=0.7) as hands, \
+         mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1,
+                                         min_detection_confidence=0.7,
+                                         min_tracking_confidence=0.7) as face_mesh:
+        _worker["hands"], _worker["face_mesh"] = hands, face_mesh
+        for index in range(start, end):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            # Dwell times run on video time, so results don't depend on worker speed
+            row = analyze_frame(frame, gesture_engine, index / fps)
+            row["frame"] = index
+            row["time_s"] = round(index / fps, 3)
+            rows.append(row)
+    cap.release()
+
+    # Write atomically so a crash never leaves a partial chunk behind
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    os.replace(tmp_path, path)
+    return start, len(rows), time.perf_counter() - began
+
+
+def chunk_path(work_dir, start, end):
+    return os.path.join(work_dir, f"chunk_{start:09d}_{end:09d}.jsonl")
+
+
+def run_manifest(video, chunk_size, objects):
+    """What a work directory's chunks depend on."""
+    stat = os.stat(video)
+    return {"video": os.path.abspath(video), "size": stat.st_size, "mtime": stat.st_mtime,
+            "chunk_size": chunk_size, "objects": objects}
+
+
+def prepare_work_dir(work_dir, manifest):
+    """Create `work_dir`, discarding chunks left by a run with a different manifest."""
+    os.makedirs(work_dir, exist_ok=True)
+    manifest_path = os.path.join(work_dir, "manifest.json")
+    try:
+        with open(manifest_path) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = None
+    if previous != manifest:
+        stale = glob.glob(os.path.join(work_dir, "chunk_*.jsonl"))
+        if stale:
+            print(f"♻️  {work_dir} belongs to a different video or options, discarding {len(stale)} chunks")
+        for path in stale:
+            os.remove(path)
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+
+def plan_chunks(video, chunk_size, work_dir, resume):
+    """Return (tasks, chunk_paths, total_frames, fps) with already finished chunks skipped."""
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video: {video}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+
+    tasks = []
+    paths = []
+    for start in range(0, total, chunk_size):
+        end = min(start + chunk_size, total)
+        path = chunk_path(work_dir, start, end)
+        paths.append(path)
+        if resume and os.path.exists(path):
+            continue
+        tasks.append((video, start, end, fps, path))
+    return tasks, paths, total, fps
+
+
+def read_timeline(paths):
+    """Read the chunks of the current plan in frame order."""
+    rows = []
+    for path in paths:
+        with open(path) as f:
+            rows.extend(json.loads(line) for line in f if line.strip())
+    return rows
+
+
+def write_timeline(rows, output):
+    """Write the timeline as CSV, JSONL or Parquet depending on the extension."""
+    extension = os.path.splitext(output)[1].lower()
+    if extension == ".jsonl":
+        with open(output, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+    elif extension == ".csv":
+        with open(output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=TIMELINE_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    elif extension == ".parquet":
+        try:
+            import pandas as pd
+        except ImportError:
+            raise RuntimeError("Parquet output requires pandas and pyarrow: pip install pandas pyarrow")
+        pd.DataFrame(rows, columns=TIMELINE_FIELDS).to_parquet(output, index=False)
+    else:
+        raise ValueError(f"Unsupported output format: {extension} (use .csv, .jsonl or .parquet)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VisioSense offline batch analysis")
+    parser.add_argument("video", help="recorded session (any format OpenCV can read)")
+    parser.add_argument("--output", required=True, help="timeline file (.csv, .jsonl or .parquet)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=300, help="frames per chunk")
+    parser.add_argument("--work-dir", help="directory for finished chunks (default: <output>.chunks)")
+    parser.add_argument("--no-resume", dest="resume", action="store_false",
+                        help="reprocess chunks that already finished")
+    parser.add_argument("--no-objects", dest="objects", action="store_false",
+                        help="skip YOLOv8 object detection")
+    args = parser.parse_args(argv)
+
+    work_dir = args.work_dir or args.output + ".chunks"
+    prepare_work_dir(work_dir, run_manifest(args.video, args.chunk_size, args.objects))
+    tasks, paths, total, fps = plan_chunks(args.video, args.chunk_size, work_dir, args.resume)
+    done_chunks = len(paths) - len(tasks)
+    print(f"🎬 {args.video}: {total} frames @ {fps:.1f} FPS, "
+          f"{len(tasks)} chunks to process ({done_chunks} already done)")
+
+    began = time.perf_counter()
+    processed = 0
+    if tasks:
+        # Spawn (not fork) so every worker gets clean MediaPipe/PyTorch state
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes=min(args.workers, len(tasks)),
+                          initializer=_init_worker, initargs=(args.objects,)) as pool:
+            for start, count, seconds in pool.imap_unordered(process_chunk, tasks):
+                processed += count
+                elapsed = time.perf_counter() - began
+                print(f"  ✓ frames {start}-{start + count - 1} in {seconds:.1f}s "
+                      f"({processed / elapsed:.1f} frames/s overall)")
+
+    rows = read_timeline(paths)
+    write_timeline(rows, args.output)
+    print(f"✅ Wrote {len(rows)} frames to {args.output} "
+          f"in {time.perf_counter() - began:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
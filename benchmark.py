@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+VisioSense - Benchmark Suite
+==================================================
+
+Pushes a recorded or synthetic clip through every pipeline stage and
+reports throughput and p50/p95/p99 latency per stage and end to end.
+
+Stages:
+- capture      reading the next frame from the source
+- preprocess   cv2.flip + cv2.cvtColor
+- hands        hands.process
+- face_mesh    face_mesh.process
+- objects      detect_objects (YOLOv8)
+- gestures     classify_hands + gesture state machine
+- overlay      landmark, box and status drawing + canvas compositing
+
+Usage:
+    python benchmark.py --source synthetic --frames 300 --output bench.json
+    python benchmark.py --source session.mp4 --compare bench.json
+
+Results are saved as JSON so regressions can be compared between commits.
+"""
+
+import argparse
+import collections
+import contextlib
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import visiosense
+from frame_sources import open_source
+from gestures import GestureStateMachine
+from whiteboard import Whiteboard
+
+STAGES = ("capture", "preprocess", "hands", "face_mesh", "objects", "gestures", "overlay")
+
+
+class StageTimer:
+    """Collect per-stage latency samples (seconds)."""
+
+    def __init__(self):
+        self.samples = collections.defaultdict(list)
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[stage].append(time.perf_counter() - start)
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+    def summary(self):
+        """Return {stage: stats} with throughput and latency percentiles."""
+        report = {}
+        for stage, samples in self.samples.items():
+            values = np.asarray(samples, dtype=np.float64)
+            p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000.0
+            total = values.sum()
+            report[stage] = {
+                "count": int(values.size),
+                "mean_ms": round(float(values.mean() * 1000.0), 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "fps": round(float(values.size / total), 2) if total > 0 else None,
+            }
+        return report
+
+
+def git_commit():
+    """Return the current git commit hash, if available."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def run_gesture_logic(hand_results, gesture_engine):
+    """The per-frame gesture classification done by main()."""
+    if not hand_results or not hand_results.multi_hand_landmarks:
+        gesture_engine.update(None)
+        return None
+    multi_handedness = hand_results.multi_handedness
+    hand_array = visiosense.landmarks_to_array(hand_results.multi_hand_landmarks)
+    is_right = np.array([
+        (multi_handedness[i].classification[0].label if multi_handedness else "Right") == "Right"
+        for i in range(len(hand_array))
+    ])
+    _, _, gestures = visiosense.classify_hands(hand_array, is_right)
+    gesture_engine.update(str(gestures[0]))
+    if len(hand_array) == 2:
+        visiosense.detect_namaskar(hand_array[0], hand_array[1])
+    return gesture_engine.active
+
+
+def run_overlay(frame, whiteboard, hand_results, detections, gesture, mp):
+    """The per-frame drawing and compositing done by main()."""
+    visiosense.draw_object_detections(frame, detections)
+    if hand_results and hand_results.multi_hand_landmarks:
+        for hand_landmarks in hand_results.multi_hand_landmarks:
+            mp.solutions.drawing_utils.draw_landmarks(
+                frame, hand_landmarks, mp.solutions.hands.HAND_CONNECTIONS)
+    whiteboard.composite(frame)
+    cv2.putText(frame, f"Gesture: {gesture or 'None'}", (10, 60),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+    return frame
+
+
+def run_benchmark(source, frames=300, warmup=10, stages=STAGES):
+    """Run `frames` frames from `source` through the selected stages."""
+    mp = visiosense.models.get("mediapipe")
+    if mp is None:
+        raise RuntimeError("MediaPipe is not available")
+    if "objects" in stages:
+        # Block until YOLO is loaded so detection isn't skipped while warming up
+        visiosense.models.get("yolo")
+
+    timer = StageTimer()
+    gesture_engine = GestureStateMachine(**visiosense.GESTURE_SETTINGS)
+    whiteboard = Whiteboard()
+    hand_results = None
+    detections = visiosense.empty_detections()
+
+    with mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=2,
+                                  min_detection_confidence=0.7,
+                                  min_tracking_confidence=0.7) as hands, \
+         mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1,
+                                         min_detection_confidence=0.7,
+                                         min_tracking_confidence=0.7) as face_mesh:
+        index = 0
+        while frames is None or index < frames + warmup:
+            frame_timer = timer if index >= warmup else StageTimer()
+            frame_start = time.perf_counter()
+
+            with frame_timer.measure("capture"):
+                ret, frame = source.read()
+            if not ret:
+                break
+
+            with frame_timer.measure("preprocess"):
+                frame = cv2.flip(frame, 1)
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+            if "hands" in stages:
+                with frame_timer.measure("hands"):
+                    hand_results = hands.process(rgb)
+            if "face_mesh" in stages:
+                with frame_timer.measure("face_mesh"):
+                    face_mesh.process(rgb)
+            if "objects" in stages:
+                with frame_timer.measure("objects"):
+                    detections = visiosense.detect_objects(frame)
+            if "gestures" in stages:
+                with frame_timer.measure("gestures"):
+                    gesture = run_gesture_logic(hand_results, gesture_engine)
+            else:
+                gesture = None
+            if "overlay" in stages:
+                with frame_timer.measure("overlay"):
+                    run_overlay(frame, whiteboard, hand_results, detections, gesture, mp)
+
+            frame_timer.add("end_to_end", time.perf_counter() - frame_start)
+            index += 1
+
+    return timer.summary()
+
+
+def compare(report, baseline):
+    """Print per-stage p50/p95 changes against a baseline report."""
+    print(f"\nComparison with {baseline['meta'].get('commit') or 'baseline'}:")
+    for stage, stats in report["stages"].items():
+        base = baseline["stages"].get(stage)
+        if not base:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms"):
+            if base[key]:
+                deltas.append(f"{key[:3]} {100.0 * (stats[key] - base[key]) / base[key]:+.1f}%")
+        print(f"  {stage:<12} " + "  ".join(deltas))
+
+
+def print_report(report):
+    print(f"\n{'stage':<12} {'fps':>8} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}  (ms)")
+    for stage, stats in report["stages"].items():
+        fps = f"{stats['fps']:.1f}" if stats["fps"] else "-"
+        print(f"{stage:<12} {fps:>8} {stats['mean_ms']:>9.2f} {stats['p50_ms']:>9.2f} "
+              f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VisioSense per-stage benchmark")
+    parser.add_argument("--source", default="synthetic",
+                        help="video file, image folder, camera index or 'synthetic[:WxH]'")
+    parser.add_argument("--frames", type=int, default=300, help="frames to measure")
+    parser.add_argument("--warmup", type=int, default=10, help="frames to run before measuring")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help="comma-separated stages to run (capture/preprocess always run)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    stages = tuple(stage.strip() for stage in args.stages.split(",") if stage.strip())
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    source = open_source(args.source, realtime=False)
+    if not source.isOpened():
+        print(f"❌ Failed to open frame source: {args.source}")
+        return 1
+
+    with source:
+        stage_report = run_benchmark(source, frames=args.frames, warmup=args.warmup, stages=stages)
+
+    report = {
+        "meta": {
+            "source": args.source,
+            "frames": args.frames,
+            "warmup": args.warmup,
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "opencv": cv2.__version__,
+        },
+        "stages": stage_report,
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report saved to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Per-stage pytest-benchmark cases over a synthetic clip.
+
+Run with:  python -m pytest benchmarks/bench_stages.py --benchmark-only
+Set VISIOSENSE_BENCH_SOURCE to a recorded clip to benchmark real footage.
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark as vs_benchmark  # noqa: E402
+import visiosense  # noqa: E402
+from frame_sources import open_source  # noqa: E402
+from gestures import GestureStateMachine  # noqa: E402
+from whiteboard import Whiteboard  # noqa: E402
+
+SOURCE = os.environ.get("VISIOSENSE_BENCH_SOURCE", "synthetic")
+
+
+@pytest.fixture(scope="module")
+def frames():
+    with open_source(SOURCE, realtime=False) as source:
+        clip = [frame for _, frame in zip(range(60), source)]
+    if not clip:
+        pytest.skip(f"no frames in {SOURCE}")
+    return [cv2.flip(frame, 1) for frame in clip]
+
+
+@pytest.fixture(scope="module")
+def mp():
+    module = visiosense.models.get("mediapipe")
+    if module is None:
+        pytest.skip("MediaPipe not available")
+    return module
+
+
+def cycle(items):
+    iterator = iter(items * 1000)
+    return lambda: next(iterator)
+
+
+def test_preprocess(benchmark, frames):
+    next_frame = cycle(frames)
+    benchmark(lambda: cv2.cvtColor(cv2.flip(next_frame(), 1), cv2.COLOR_BGR2RGB))
+
+
+def test_hands(benchmark, frames, mp):
+    rgbs = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+    next_rgb = cycle(rgbs)
+    with mp.solutions.hands.Hands(max_num_hands=2, min_detection_confidence=0.7) as hands:
+        benchmark(lambda: hands.process(next_rgb()))
+
+
+def test_face_mesh(benchmark, frames, mp):
+    rgbs = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+    next_rgb = cycle(rgbs)
+    with mp.solutions.face_mesh.FaceMesh(max_num_faces=1, min_detection_confidence=0.7) as face_mesh:
+        benchmark(lambda: face_mesh.process(next_rgb()))
+
+
+def test_objects(benchmark, frames):
+    if visiosense.models.get("yolo") is None:
+        pytest.skip("YOLOv8 not available")
+    next_frame = cycle(frames)
+    benchmark(lambda: visiosense.detect_objects(next_frame()))
+
+
+def test_gestures(benchmark, frames, mp):
+    with mp.solutions.hands.Hands(max_num_hands=2) as hands:
+        results = [hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)) for frame in frames]
+    gesture_engine = GestureStateMachine(**visiosense.GESTURE_SETTINGS)
+    next_result = cycle(results)
+    benchmark(lambda: vs_benchmark.run_gesture_logic(next_result(), gesture_engine))
+
+
+def test_overlay(benchmark, frames, mp):
+    whiteboard = Whiteboard()
+    for offset in (0.2, 0.4, 0.6):
+        for step in range(20):
+            whiteboard.draw_to(0.1 + step * 0.04, offset + 0.1 * np.sin(step / 3))
+        whiteboard.lift()
+    detections = visiosense.empty_detections()
+    next_frame = cycle(frames)
+    benchmark(lambda: vs_benchmark.run_overlay(next_frame().copy(), whiteboard, None, detections, "Fist", mp))
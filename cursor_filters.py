@@ -0,0 +1,149 @@
+"""
+VisioSense - Cursor Filters
+==================================================
+
+Timestamp-aware smoothing for the mouse-mode cursor.
+
+- "ema":        the original exponential moving average, corrected for
+                frame timing so lag does not grow when FPS drops
+- "one_euro":   One Euro filter (Casiez et al.): heavy smoothing while the
+                hand is still, little lag during fast moves
+- "predictive": One Euro plus constant-velocity prediction that projects
+                the cursor `lead` seconds ahead to offset pipeline latency
+
+Every filter takes (x, y, timestamp) in seconds and is tuned with a single
+`smoothing` value in [0, 1], driven by the "Cursor Smoothing" slider.
+"""
+
+import math
+
+import numpy as np
+
+# Frame rate the original per-frame EMA factor was tuned for
+REFERENCE_FPS = 30.0
+
+
+def _alpha(cutoff, dt):
+    """Smoothing factor of a first-order low-pass filter with `cutoff` Hz."""
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class CursorFilter:
+    """Base class: filter 2D cursor positions with real timestamps."""
+
+    name = None
+
+    def __init__(self, smoothing=0.4):
+        self._last = None
+        self._last_time = None
+        self.set_smoothing(smoothing)
+
+    def set_smoothing(self, smoothing):
+        """Set the smoothing amount (0 = raw input, 1 = heaviest smoothing)."""
+        self.smoothing = min(max(float(smoothing), 0.0), 1.0)
+
+    def reset(self):
+        """Forget the filter state; the next sample passes through unchanged."""
+        self._last = None
+        self._last_time = None
+
+    def __call__(self, x, y, timestamp):
+        point = np.array((x, y), dtype=np.float64)
+        if self._last is None:
+            self._start(point)
+        else:
+            # Guard against duplicate or out-of-order timestamps
+            dt = max(timestamp - self._last_time, 1e-3)
+            self._last = self._update(point, dt)
+        self._last_time = timestamp
+        return self._output()
+
+    def _start(self, point):
+        self._last = point
+
+    def _output(self):
+        return float(self._last[0]), float(self._last[1])
+
+
+class EMAFilter(CursorFilter):
+    """Exponential moving average; smoothing 0.4 matches the old 0.4 factor at 30 FPS."""
+
+    name = "ema"
+
+    def set_smoothing(self, smoothing):
+        super().set_smoothing(smoothing)
+        # 1.0 at smoothing 0, 0.4 at the default 0.4, 0.1 at smoothing 1
+        self.alpha = 0.4 ** (self.smoothing / 0.4)
+
+    def _update(self, point, dt):
+        # Scale the per-frame factor to the real frame interval
+        alpha = 1.0 - (1.0 - self.alpha) ** (dt * REFERENCE_FPS)
+        return self._last + (point - self._last) * alpha
+
+
+class OneEuroFilter(CursorFilter):
+    """One Euro filter: the cutoff frequency rises with cursor speed."""
+
+    name = "one_euro"
+
+    def __init__(self, smoothing=0.4, d_cutoff=1.0):
+        self.d_cutoff = d_cutoff
+        self._velocity = np.zeros(2)
+        super().__init__(smoothing)
+
+    def set_smoothing(self, smoothing):
+        super().set_smoothing(smoothing)
+        # Minimum cutoff from 4 Hz (raw) down to 0.2 Hz (heavy smoothing)
+        self.min_cutoff = 4.0 * 0.05 ** self.smoothing
+        # Speed coefficient in Hz per (pixel/second)
+        self.beta = 0.01 * (1.0 - 0.5 * self.smoothing)
+
+    def reset(self):
+        super().reset()
+        self._velocity = np.zeros(2)
+
+    def _update(self, point, dt):
+        raw_velocity = (point - self._last) / dt
+        self._velocity += (raw_velocity - self._velocity) * _alpha(self.d_cutoff, dt)
+        cutoff = self.min_cutoff + self.beta * np.abs(self._velocity)
+        alpha = 1.0 / (1.0 + 1.0 / (2.0 * math.pi * cutoff * dt))
+        return self._last + (point - self._last) * alpha
+
+    @property
+    def velocity(self):
+        """Filtered cursor velocity in units per second."""
+        return self._velocity
+
+
+class PredictiveFilter(OneEuroFilter):
+    """One Euro filter with constant-velocity prediction `lead` seconds ahead."""
+
+    name = "predictive"
+
+    def __init__(self, smoothing=0.4, lead=0.05, max_offset=200.0, d_cutoff=1.0):
+        self.lead = lead
+        self.max_offset = max_offset
+        super().__init__(smoothing, d_cutoff)
+
+    def _output(self):
+        offset = self._velocity * self.lead
+        length = float(np.hypot(*offset))
+        if length > self.max_offset:
+            # Don't overshoot on sudden jumps
+            offset *= self.max_offset / length
+        return float(self._last[0] + offset[0]), float(self._last[1] + offset[1])
+
+
+FILTERS = {
+    "ema": EMAFilter,
+    "one_euro": OneEuroFilter,
+    "predictive": PredictiveFilter,
+}
+
+
+def create_filter(name="one_euro", smoothing=0.4, **kwargs):
+    """Create a cursor filter by name."""
+    if name not in FILTERS:
+        raise ValueError(f"Unknown cursor filter: {name}")
+    return FILTERS[name](smoothing, **kwargs)
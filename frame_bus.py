@@ -0,0 +1,235 @@
+"""
+VisioSense - Frame Bus
+==================================================
+
+A single capture owner publishes frames to any number of subscribers
+(the gesture engine, the MJPEG stream, recorders, ...), so only one
+reader ever opens the camera.
+
+Frames are published by reference on named topics ("raw" from the camera,
+"annotated" from the gesture engine) and marked read-only, so every
+subscriber shares one decoded frame without copying. Each subscriber
+chooses its own drop policy:
+
+- "latest":      keep only the newest frame (live views, the engine)
+- "drop_oldest": bounded queue that discards the oldest frame when full
+- "drop_newest": bounded queue that rejects new frames when full (recorders
+                 that prefer contiguous runs over freshness)
+"""
+
+import collections
+import threading
+import time
+
+import cv2
+
+import metrics
+
+BusFrame = collections.namedtuple('BusFrame', ['seq', 'timestamp', 'frame'])
+
+DROP_POLICIES = ("latest", "drop_oldest", "drop_newest")
+
+
+class FrameSubscription:
+    """A subscriber's view of one bus topic.
+
+    Besides `get()`, it offers `read()`, `isOpened()` and `release()` so it
+    can stand in for a `cv2.VideoCapture` in the frame loop.
+    """
+
+    def __init__(self, bus, topic, policy="latest", maxsize=1):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.bus = bus
+        self.topic = topic
+        self.policy = policy
+        self.maxsize = max(1, maxsize)
+        self.dropped = 0
+        self.closed = False
+        # Capture timestamp of the frame last returned by read()
+        self.last_timestamp = None
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+
+    def _offer(self, item):
+        with self._cond:
+            if self.closed:
+                return
+            if self.policy == "latest":
+                if self._items:
+                    self.dropped += len(self._items)
+                    metrics.FRAMES_DROPPED.labels(topic=self.topic).inc(len(self._items))
+                    self._items.clear()
+            elif len(self._items) >= self.maxsize:
+                self.dropped += 1
+                metrics.FRAMES_DROPPED.labels(topic=self.topic).inc()
+                if self.policy == "drop_newest":
+                    return
+                self._items.popleft()
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the next BusFrame, or None on timeout or when closed."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self.closed, timeout)
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def pending(self):
+        """Number of frames waiting to be read."""
+        with self._cond:
+            return len(self._items)
+
+    def read(self):
+        """VideoCapture-style read: (True, frame) or (False, None) when closed."""
+        item = self.get()
+        if item is None:
+            return False, None
+        self.last_timestamp = item.timestamp
+        return True, item.frame
+
+    def isOpened(self):
+        return not self.closed
+
+    def close(self):
+        """Stop receiving frames and wake up any blocked reader."""
+        self.bus.unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    release = close
+
+
+class FrameBus:
+    """Fan out published frames to per-topic subscribers."""
+
+    def __init__(self):
+        self._subscribers = collections.defaultdict(list)
+        self._seq = collections.Counter()
+        self._latest = {}
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def subscribe(self, topic="raw", policy="latest", maxsize=1):
+        """Create a subscription to `topic` with the given drop policy."""
+        subscription = FrameSubscription(self, topic, policy, maxsize)
+        with self._lock:
+            if self.closed:
+                subscription.closed = True
+            else:
+                self._subscribers[topic].append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+
+    def publish(self, topic, frame, timestamp=None):
+        """Publish `frame` on `topic`; the frame must not be modified afterwards."""
+        frame.setflags(write=False)
+        with self._lock:
+            if self.closed:
+                return None
+            self._seq[topic] += 1
+            item = BusFrame(self._seq[topic], timestamp or time.time(), frame)
+            self._latest[topic] = item
+            subscribers = list(self._subscribers[topic])
+        for subscription in subscribers:
+            subscription._offer(item)
+        return item
+
+    def latest(self, topic):
+        """Return the most recent BusFrame on `topic` (or None)."""
+        return self._latest.get(topic)
+
+    def subscriber_count(self, topic):
+        with self._lock:
+            return len(self._subscribers[topic])
+
+    def close(self):
+        """Close the bus and every subscription."""
+        with self._lock:
+            self.closed = True
+            subscribers = [s for subs in self._subscribers.values() for s in subs]
+        for subscription in subscribers:
+            subscription.close()
+
+
+class CameraPublisher:
+    """Own the camera (or another frame source) and publish every frame on the bus.
+
+    With a RuntimeConfig as `config`, its "capture" section (width, height,
+    fps) overrides the arguments and changes are applied between frames.
+    """
+
+    def __init__(self, bus, device=0, width=640, height=480, fps=30, topic="raw", source=None,
+                 config=None):
+        self.bus = bus
+        self.device = device
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.topic = topic
+        self.config = config
+        self._config_version = None
+        self.frame_shape = None
+        self._running = False
+        self._thread = None
+        self._cap = None
+
+    def start(self):
+        """Open the camera and start publishing. Returns False if it can't be opened."""
+        self._cap = self.source if self.source is not None else cv2.VideoCapture(self.device)
+        if not self._cap.isOpened():
+            print("❌ Failed to open camera!")
+            self._cap.release()
+            self._cap = None
+            return False
+
+        self._apply_settings()
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="visiosense-capture", daemon=True)
+        self._thread.start()
+        return True
+
+    def _apply_settings(self):
+        if self.config is not None:
+            self._config_version = self.config.version
+            capture = self.config.get("capture")
+            self.width, self.height, self.fps = capture["width"], capture["height"], capture["fps"]
+        if self.source is None:
+            self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            self._cap.set(cv2.CAP_PROP_FPS, self.fps)
+
+    def _run(self):
+        while self._running:
+            if self.config is not None and self.config.version != self._config_version:
+                capture = (self.width, self.height, self.fps)
+                self._config_version = self.config.version
+                if tuple(self.config.get("capture").values()) != capture:
+                    self._apply_settings()
+            ret, frame = self._cap.read()
+            if not ret:
+                print("❌ Failed to read frame from camera")
+                break
+            self.frame_shape = frame.shape
+            metrics.FRAMES_CAPTURED.inc()
+            self.bus.publish(self.topic, frame)
+        self._cap.release()
+        # No more frames: wake up and end every subscriber
+        self.bus.close()
+
+    def stop(self):
+        """Stop capturing and release the camera."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
@@ -0,0 +1,165 @@
+"""
+VisioSense - Gesture State Machine
+==================================================
+
+Turns noisy per-frame gesture labels into stable, discrete gestures.
+
+`GestureVoter` keeps a sliding window of labels with incremental vote
+counts, so adding a frame is O(1) and allocates nothing. On top of it,
+`GestureStateMachine` applies hysteresis and dwell times:
+
+- a gesture starts once it holds at least `enter_ratio` of the votes
+  for its enter dwell time
+- the active gesture ends once its share drops below `exit_ratio`
+  for its exit dwell time
+
+Each transition is reported as a "start" or "end" GestureEvent, so
+actions like mode switches and canvas clears fire once per gesture
+instead of flickering with every majority change.
+"""
+
+import collections
+import time
+
+GestureEvent = collections.namedtuple('GestureEvent', ['kind', 'gesture', 'timestamp', 'duration'])
+
+
+class GestureVoter:
+    """Sliding-window majority vote with incremental counts."""
+
+    def __init__(self, window=8):
+        self.window = window
+        self._history = collections.deque()
+        self._counts = {}
+        self._leader = None
+
+    def add(self, label):
+        """Add one frame's label, evicting the oldest once the window is full."""
+        if len(self._history) >= self.window:
+            self._remove(self._history.popleft())
+        self._history.append(label)
+        count = self._counts.get(label, 0) + 1
+        self._counts[label] = count
+        # Ties keep the current leader, which favours the gesture already shown
+        if self._leader is None or count > self._counts.get(self._leader, 0):
+            self._leader = label
+
+    def _remove(self, label):
+        count = self._counts[label] - 1
+        if count:
+            self._counts[label] = count
+        else:
+            del self._counts[label]
+        if label == self._leader:
+            # Only a handful of distinct labels exist, so this scan is constant time
+            self._leader = max(self._counts, key=self._counts.get) if self._counts else None
+
+    @property
+    def leader(self):
+        """The label with the most votes (None if the window is empty)."""
+        return self._leader if self._history else None
+
+    def share(self, label):
+        """Fraction of the window voting for `label`."""
+        if not self._history:
+            return 0.0
+        return self._counts.get(label, 0) / len(self._history)
+
+    def clear(self):
+        self._history.clear()
+        self._counts.clear()
+        self._leader = None
+
+    def __len__(self):
+        return len(self._history)
+
+
+class GestureStateMachine:
+    """Stable gesture tracking with hysteresis and per-gesture dwell times.
+
+    `dwell` maps a gesture to its (enter_seconds, exit_seconds); gestures
+    not listed use `enter_dwell` and `exit_dwell`.
+    """
+
+    def __init__(self, window=8, enter_ratio=0.6, exit_ratio=0.4,
+                 enter_dwell=0.1, exit_dwell=0.15, dwell=None):
+        if exit_ratio > enter_ratio:
+            raise ValueError("exit_ratio must not be greater than enter_ratio")
+        self.voter = GestureVoter(window)
+        self.enter_ratio = enter_ratio
+        self.exit_ratio = exit_ratio
+        self.enter_dwell = enter_dwell
+        self.exit_dwell = exit_dwell
+        self.dwell = dict(dwell or {})
+        self.active = None
+        self.active_since = None
+        self._candidate = None
+        self._candidate_since = None
+        self._exit_since = None
+
+    def configure(self, window=None, enter_ratio=None, exit_ratio=None,
+                  enter_dwell=None, exit_dwell=None, dwell=None):
+        """Change parameters in place; the active gesture is kept."""
+        if window is not None and window != self.voter.window:
+            self.voter = GestureVoter(window)
+        if enter_ratio is not None:
+            self.enter_ratio = enter_ratio
+        if exit_ratio is not None:
+            self.exit_ratio = exit_ratio
+        if self.exit_ratio > self.enter_ratio:
+            raise ValueError("exit_ratio must not be greater than enter_ratio")
+        if enter_dwell is not None:
+            self.enter_dwell = enter_dwell
+        if exit_dwell is not None:
+            self.exit_dwell = exit_dwell
+        if dwell is not None:
+            self.dwell = dict(dwell)
+
+    def dwell_for(self, gesture):
+        return self.dwell.get(gesture, (self.enter_dwell, self.exit_dwell))
+
+    def update(self, label, timestamp=None):
+        """Feed one frame's label (None for no hand); return the resulting events."""
+        if timestamp is None:
+            timestamp = time.time()
+        self.voter.add(label)
+        events = []
+
+        if self.active is not None:
+            if self.voter.share(self.active) < self.exit_ratio:
+                if self._exit_since is None:
+                    self._exit_since = timestamp
+                if timestamp - self._exit_since >= self.dwell_for(self.active)[1]:
+                    events.append(self._end(timestamp))
+            else:
+                self._exit_since = None
+
+        leader = self.voter.leader
+        if leader is not None and leader != self.active and self.voter.share(leader) >= self.enter_ratio:
+            if leader != self._candidate:
+                self._candidate, self._candidate_since = leader, timestamp
+            if self.active is None and timestamp - self._candidate_since >= self.dwell_for(leader)[0]:
+                self.active = leader
+                self.active_since = timestamp
+                self._candidate = None
+                events.append(GestureEvent("start", leader, timestamp, 0.0))
+        else:
+            self._candidate = None
+
+        return events
+
+    def _end(self, timestamp):
+        event = GestureEvent("end", self.active, timestamp, timestamp - self.active_since)
+        self.active = None
+        self.active_since = None
+        self._exit_since = None
+        return event
+
+    def reset(self, timestamp=None):
+        """Forget all votes; returns an "end" event if a gesture was active."""
+        if timestamp is None:
+            timestamp = time.time()
+        events = [self._end(timestamp)] if self.active is not None else []
+        self.voter.clear()
+        self._candidate = None
+        return events
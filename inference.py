@@ -0,0 +1,580 @@
+"""
+VisioSense - Inference Stages
+==================================================
+
+Scheduling helpers for the per-frame detectors (MediaPipe Hands,
+MediaPipe FaceMesh and YOLOv8).
+
+The detectors are independent of each other, so instead of running them
+back to back they are submitted to a small thread pool and joined before
+the gesture logic runs. MediaPipe graphs and PyTorch both release the GIL
+inside their native code, so threads are enough to overlap the models and
+the frame time becomes that of the slowest stage instead of the sum.
+
+Object detection can additionally be decoupled from the frame rate with
+`AsyncObjectDetector`, which runs YOLO in a background worker and tracks
+boxes with optical flow on frames without a fresh result.
+`ProcessObjectDetector` does the same with YOLO in separate worker
+processes that read frames from a shared-memory ring, so inference scales
+across cores and never competes for the GIL with the frame loop (or the
+web server running it).
+
+Face analysis runs on its own schedule with `FaceAnalysisScheduler`, which
+holds or interpolates head angle and expression between FaceMesh runs and
+can crop the input to the last known face.
+
+Hand tracking uses `HandROITracker` to feed MediaPipe Hands a crop around
+the hands found on the previous frame, falling back to the full frame
+when tracking is lost. Crops and full frames go to separate Hands
+instances, so each one tracks landmarks in a single coordinate space.
+
+Object detections are passed around as NumPy structured arrays of
+`DETECTION_DTYPE` (one record per box) rather than lists of dicts.
+"""
+
+import collections
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from shared_frames import SharedFrameRing
+
+# One record per detected object: xyxy box in frame pixels, confidence, class id
+DETECTION_DTYPE = np.dtype([
+    ('box', np.float32, (4,)),
+    ('score', np.float32),
+    ('class_id', np.int32),
+])
+
+# FaceMesh landmarks read by the face analysis (nose tip, forehead, lips,
+# chin, ears); the forehead/chin/ear points also bound the face crop.
+FACE_KEY_LANDMARKS = (1, 10, 13, 61, 152, 234, 291, 454)
+FACE_BOUNDS_LANDMARKS = (10, 152, 234, 454)
+
+FacePoint = collections.namedtuple('FacePoint', ['x', 'y'])
+
+
+def empty_detections():
+    """Return an empty DETECTION_DTYPE array."""
+    return np.empty(0, dtype=DETECTION_DTYPE)
+
+
+class StagedInferenceExecutor:
+    """Run a fixed set of detector stages concurrently on the same frame.
+
+    `stages` maps a stage name to a callable taking `(frame, rgb)`. Each
+    call to `run()` submits every stage, waits for all of them and returns
+    a dict of results keyed by stage name. Per-stage wall time of the last
+    run is kept in `last_timings` (seconds).
+    """
+
+    def __init__(self, stages, max_workers=None, parallel=True):
+        self.stages = dict(stages)
+        self.parallel = parallel
+        self.last_timings = {}
+        self._pool = None
+        if parallel and self.stages:
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers or len(self.stages),
+                thread_name_prefix="visiosense-stage",
+            )
+
+    def _timed(self, name, stage, frame, rgb):
+        start = time.perf_counter()
+        try:
+            return stage(frame, rgb)
+        finally:
+            self.last_timings[name] = time.perf_counter() - start
+
+    def run(self, frame, rgb):
+        """Run all stages on one frame and return {stage_name: result}."""
+        if self._pool is None:
+            return {name: self._timed(name, stage, frame, rgb)
+                    for name, stage in self.stages.items()}
+
+        futures = {name: self._pool.submit(self._timed, name, stage, frame, rgb)
+                   for name, stage in self.stages.items()}
+        # Join step: every stage must finish before gesture logic and rendering
+        return {name: future.result() for name, future in futures.items()}
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+        return False
+
+
+class OpticalFlowBoxTracker:
+    """Propagate detection boxes between frames with sparse Lucas-Kanade flow.
+
+    A small grid of points inside every box is tracked from the previous
+    grayscale frame to the current one, and each box is shifted by the
+    median displacement of its successfully tracked points.
+    """
+
+    GRID = 3
+
+    def __init__(self):
+        self.prev_gray = None
+        self.detections = empty_detections()
+        self.stamp = 0.0
+
+    def reset(self, gray, detections, stamp):
+        """Start tracking `detections` found on `gray` at time `stamp`."""
+        self.prev_gray = gray
+        self.detections = detections.copy()
+        self.stamp = stamp
+
+    def update(self, gray):
+        """Move the tracked boxes onto `gray` and return the detections."""
+        if self.prev_gray is None or len(self.detections) == 0:
+            self.prev_gray = gray
+            return self.detections.copy()
+
+        boxes = self.detections['box']
+        steps = (np.arange(self.GRID, dtype=np.float32) + 1) / (self.GRID + 1)
+        xs = boxes[:, 0:1] + (boxes[:, 2:3] - boxes[:, 0:1]) * steps
+        ys = boxes[:, 1:2] + (boxes[:, 3:4] - boxes[:, 1:2]) * steps
+        points = np.stack(np.broadcast_arrays(xs[:, None, :], ys[:, :, None]), axis=-1)
+        points = np.ascontiguousarray(points.reshape(-1, 1, 2), dtype=np.float32)
+
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(
+            self.prev_gray, gray, points, None, winSize=(15, 15), maxLevel=2)
+        flow = (new_points - points).reshape(len(boxes), -1, 2)
+        tracked = status.reshape(len(boxes), -1).astype(bool)
+
+        # Median flow of the tracked points of every box that kept any
+        moved = tracked.any(axis=1)
+        if moved.any():
+            shift = np.nanmedian(np.where(tracked[moved, :, None], flow[moved], np.nan), axis=1)
+            boxes[moved] += np.tile(shift, 2)
+
+        self.prev_gray = gray
+        return self.detections.copy()
+
+
+class AsyncObjectDetector:
+    """Run object detection in a background thread on the latest frame.
+
+    The capture loop hands every frame to `update()`. The worker picks up
+    the newest frame whenever it is idle (older frames are dropped) and at
+    most once every `interval` seconds. Frames without a fresh result get
+    boxes propagated by `OpticalFlowBoxTracker`; results older than
+    `max_age` seconds are discarded instead of drawn.
+    """
+
+    def __init__(self, detect_fn, interval=0.0, max_age=0.5):
+        self.detect_fn = detect_fn
+        self.interval = interval
+        self.max_age = max_age
+        self.tracker = OpticalFlowBoxTracker()
+        self._cond = threading.Condition()
+        self._pending = None
+        self._result = None
+        self._result_seq = 0
+        self._consumed_seq = 0
+        self._last_submit = 0.0
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="visiosense-yolo", daemon=True)
+        self._thread.start()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                frame, gray, stamp = self._pending
+                self._pending = None
+
+            try:
+                detections = self.detect_fn(frame)
+            except Exception as e:
+                print(f"Error in object detection: {e}")
+                detections = empty_detections()
+
+            with self._cond:
+                self._result = (gray, detections, stamp)
+                self._result_seq += 1
+
+    def update(self, frame):
+        """Submit `frame` for detection and return detections aligned to it."""
+        now = time.time()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        with self._cond:
+            if now - self._last_submit >= self.interval:
+                # Copy: the caller draws overlays onto `frame` after this call
+                self._pending = (frame.copy(), gray, now)
+                self._last_submit = now
+                self._cond.notify()
+            fresh = None
+            if self._result_seq != self._consumed_seq:
+                fresh = self._result
+                self._consumed_seq = self._result_seq
+
+        if fresh is not None:
+            self.tracker.reset(*fresh)
+
+        if now - self.tracker.stamp > self.max_age:
+            return empty_detections()
+        return self.tracker.update(gray)
+
+    def stop(self):
+        """Stop the background worker."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=2.0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def _object_detection_worker(ring_spec, params, claimed, results, stop_event, threads):
+    """Worker process: run YOLO on frames from the shared ring, in order of submission."""
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    import visiosense
+    # Load this process's own model before taking any frames
+    visiosense.models.get("yolo")
+    ring = SharedFrameRing.attach(**ring_spec)
+    item = None
+    try:
+        while not stop_event.is_set():
+            if ring.wait(claimed.value, timeout=0.2) is None:
+                continue
+            with claimed.get_lock():
+                seq = claimed.value + 1
+                if seq > ring.last_seq:
+                    continue
+                claimed.value = seq
+            item = ring.read(seq)
+            if item is None:
+                results.put((seq, None))
+                continue
+            conf, imgsz = params[:]
+            # YOLO reads the frame straight out of shared memory
+            detections = visiosense.detect_objects(item[1], conf=conf, imgsz=int(imgsz))
+            # A frame overwritten mid-inference gives no usable boxes
+            results.put((seq, detections if ring.valid(seq) else None))
+    finally:
+        # Drop the last frame view so the mapping can be closed
+        item = None
+        ring.close()
+
+
+class ProcessObjectDetector:
+    """Run object detection in `workers` separate processes.
+
+    Same interface and tracking as `AsyncObjectDetector`, but frames are
+    copied once into a `SharedFrameRing` and detected by worker processes
+    with their own YOLO model; only the small detection arrays come back
+    through a queue. A frame is submitted whenever a worker is idle (and
+    `interval` seconds have passed), so the ring never laps a frame that
+    is still being read. The ring is sized from the first frame and
+    recreated if the resolution grows.
+    """
+
+    def __init__(self, conf=0.5, imgsz=640, workers=1, interval=0.0, max_age=0.5, result_timeout=5.0):
+        self.workers = max(1, workers)
+        self.interval = interval
+        self.max_age = max_age
+        self.result_timeout = result_timeout
+        self.tracker = OpticalFlowBoxTracker()
+        self._context = multiprocessing.get_context("spawn")
+        self._params = self._context.Array('d', (conf, imgsz))
+        self.ring = None
+        self._processes = []
+        self._in_flight = {}
+        self._last_submit = 0.0
+
+    def configure(self, conf=None, imgsz=None):
+        """Change YOLO parameters; workers use them from their next frame."""
+        with self._params.get_lock():
+            if conf is not None:
+                self._params[0] = conf
+            if imgsz is not None:
+                self._params[1] = imgsz
+
+    def _start(self, frame):
+        self.ring = SharedFrameRing.create(frame.nbytes, slots=self.workers + 2, context=self._context)
+        self._claimed = self._context.Value('q', 0)
+        self._results = self._context.Queue()
+        self._stop = self._context.Event()
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._processes = [
+            self._context.Process(
+                target=_object_detection_worker, name=f"visiosense-yolo-{i}", daemon=True,
+                args=(self.ring.spec(), self._params, self._claimed, self._results, self._stop, threads))
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+    def _collect(self, now):
+        while True:
+            try:
+                seq, detections = self._results.get_nowait()
+            except queue.Empty:
+                break
+            submitted = self._in_flight.pop(seq, None)
+            # With several workers results can arrive out of order; keep the newest
+            if submitted is not None and detections is not None and submitted[1] >= self.tracker.stamp:
+                self.tracker.reset(submitted[0], detections, submitted[1])
+        # Don't wait forever for a worker that died
+        for seq, (gray, stamp) in list(self._in_flight.items()):
+            if now - stamp > self.result_timeout:
+                del self._in_flight[seq]
+
+    def update(self, frame):
+        """Submit `frame` for detection and return detections aligned to it."""
+        now = time.time()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self.ring is not None and not self.ring.fits(frame):
+            self.stop()
+        if self.ring is None:
+            self._start(frame)
+
+        self._collect(now)
+        if len(self._in_flight) < self.workers and now - self._last_submit >= self.interval:
+            # The ring keeps its own copy, so drawing overlays afterwards is fine
+            seq = self.ring.write(frame, now)
+            self._in_flight[seq] = (gray, now)
+            self._last_submit = now
+
+        if now - self.tracker.stamp > self.max_age:
+            return empty_detections()
+        return self.tracker.update(gray)
+
+    def stop(self):
+        """Stop the worker processes and free the ring."""
+        if self.ring is None:
+            return
+        self._stop.set()
+        for process in self._processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._in_flight.clear()
+        self.ring.close()
+        self.ring = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+class FaceAnalysisScheduler:
+    """Run FaceMesh analysis on its own schedule instead of every frame.
+
+    FaceMesh runs every `every_n` frames, or at `target_hz` if given.
+    `analyze` receives a mapping from landmark index (FACE_KEY_LANDMARKS)
+    to full-frame normalized FacePoints and returns a dict of values such
+    as head angle and expression. Between runs the last values are held,
+    or, with `interpolate`, numeric values are interpolated between the
+    last two samples (one run behind). With `crop`, FaceMesh only sees a
+    padded crop around the last known face and falls back to the full
+    frame as soon as the face is lost.
+    """
+
+    def __init__(self, face_mesh, analyze, every_n=1, target_hz=None,
+                 crop=False, padding=0.3, interpolate=False):
+        self.face_mesh = face_mesh
+        self.analyze = analyze
+        self.every_n = max(1, int(every_n))
+        self.target_hz = target_hz
+        self.crop = crop
+        self.padding = padding
+        self.interpolate = interpolate
+        self.bbox = None
+        self._frame_index = 0
+        self._last_run = None
+        self._samples = collections.deque(maxlen=2)
+
+    def _due(self, now):
+        if self._last_run is None:
+            return True
+        if self.target_hz:
+            return now - self._last_run >= 1.0 / self.target_hz
+        return self._frame_index % self.every_n == 0
+
+    def _run(self, rgb, now):
+        h, w = rgb.shape[:2]
+        x0, y0, crop_w, crop_h = 0, 0, w, h
+        image = rgb
+        if self.crop and self.bbox is not None:
+            x0, y0, x1, y1 = self.bbox
+            crop_w, crop_h = x1 - x0, y1 - y0
+            image = np.ascontiguousarray(rgb[y0:y1, x0:x1])
+
+        results = self.face_mesh.process(image)
+        self._last_run = now
+
+        if not results.multi_face_landmarks:
+            if image is not rgb:
+                # Lost the face inside the crop: retry on the full frame next frame
+                self._last_run = None
+            self.bbox = None
+            self._samples.clear()
+            return
+
+        landmarks = results.multi_face_landmarks[0].landmark
+        points = {i: FacePoint((landmarks[i].x * crop_w + x0) / w,
+                               (landmarks[i].y * crop_h + y0) / h)
+                  for i in FACE_KEY_LANDMARKS}
+        self._samples.append((now, self.analyze(points)))
+
+        if self.crop:
+            xs = [points[i].x for i in FACE_BOUNDS_LANDMARKS]
+            ys = [points[i].y for i in FACE_BOUNDS_LANDMARKS]
+            pad_x = (max(xs) - min(xs)) * self.padding
+            pad_y = (max(ys) - min(ys)) * self.padding
+            x1 = int(max(0.0, min(xs) - pad_x) * w)
+            y1 = int(max(0.0, min(ys) - pad_y) * h)
+            x2 = int(min(1.0, max(xs) + pad_x) * w)
+            y2 = int(min(1.0, max(ys) + pad_y) * h)
+            self.bbox = (x1, y1, x2, y2) if x2 - x1 > 16 and y2 - y1 > 16 else None
+
+    def _current(self, now):
+        if not self._samples:
+            return None
+        last_time, last = self._samples[-1]
+        if not self.interpolate or len(self._samples) < 2:
+            return dict(last)
+
+        prev_time, prev = self._samples[0]
+        t = min(1.0, (now - last_time) / max(last_time - prev_time, 1e-6))
+        values = dict(last)
+        for key, value in last.items():
+            if isinstance(value, (int, float)) and isinstance(prev.get(key), (int, float)):
+                values[key] = prev[key] + (value - prev[key]) * t
+        return values
+
+    def process(self, rgb):
+        """Return the face analysis for this frame (None if no face)."""
+        now = time.time()
+        if self._due(now):
+            self._run(rgb, now)
+        self._frame_index += 1
+        return self._current(now)
+
+
+class HandROITracker:
+    """Feed MediaPipe Hands a crop around the hands from the previous frame.
+
+    The region of interest is a padded square around all hands found last
+    time. It is only moved when a hand gets close to its border (or it
+    becomes much larger than needed), so MediaPipe's own landmark tracking
+    keeps working between frames. Crops smaller than `min_size` pixels are
+    upscaled, which helps small, distant hands. Landmarks are mapped back to
+    full-frame normalized coordinates in place, so callers see the same
+    results as from `hands.process(rgb)`. The full frame is processed when
+    no hand is found in the crop and every `full_frame_every` frames, so
+    new hands entering the view are picked up.
+
+    MediaPipe's video mode tracks each frame's hands from the previous
+    frame's landmarks, so crops go to their own `crop_hands` instance
+    (owned by the tracker, see `close()`) and `hands` only ever sees full
+    frames.
+    """
+
+    def __init__(self, hands, crop_hands, padding=0.6, min_size=None, full_frame_every=30):
+        self.hands = hands
+        self.crop_hands = crop_hands
+        self.padding = padding
+        self.min_size = min_size
+        self.full_frame_every = full_frame_every
+        self.roi = None
+        self._roi_frames = 0
+
+    def _process_roi(self, rgb, w, h):
+        x1, y1, x2, y2 = self.roi
+        crop_w, crop_h = x2 - x1, y2 - y1
+        crop = rgb[y1:y2, x1:x2]
+        if self.min_size and min(crop_w, crop_h) < self.min_size:
+            scale = self.min_size / min(crop_w, crop_h)
+            crop = cv2.resize(crop, (round(crop_w * scale), round(crop_h * scale)),
+                              interpolation=cv2.INTER_LINEAR)
+        else:
+            crop = np.ascontiguousarray(crop)
+
+        results = self.crop_hands.process(crop)
+        for hand_landmarks in results.multi_hand_landmarks or []:
+            for lm in hand_landmarks.landmark:
+                lm.x = (lm.x * crop_w + x1) / w
+                lm.y = (lm.y * crop_h + y1) / h
+                lm.z = lm.z * crop_w / w
+        return results
+
+    def _update_roi(self, multi_hand_landmarks, w, h):
+        xs = [lm.x * w for hand in multi_hand_landmarks for lm in hand.landmark]
+        ys = [lm.y * h for hand in multi_hand_landmarks for lm in hand.landmark]
+        hx1, hy1, hx2, hy2 = min(xs), min(ys), max(xs), max(ys)
+        side = max(hx2 - hx1, hy2 - hy1) * (1 + 2 * self.padding)
+        side = int(min(max(side, 32), w, h))
+
+        if self.roi is not None:
+            rx1, ry1, rx2, ry2 = self.roi
+            margin = (rx2 - rx1) * 0.1
+            inside = (hx1 >= rx1 + margin and hy1 >= ry1 + margin and
+                      hx2 <= rx2 - margin and hy2 <= ry2 - margin)
+            if inside and rx2 - rx1 <= side * 1.5:
+                return
+
+        # Re-center a square ROI on the hands, shifted to stay inside the frame
+        cx, cy = (hx1 + hx2) / 2, (hy1 + hy2) / 2
+        x1 = int(min(max(cx - side / 2, 0), w - side))
+        y1 = int(min(max(cy - side / 2, 0), h - side))
+        self.roi = (x1, y1, x1 + side, y1 + side)
+
+    def process(self, rgb):
+        """Detect hands on `rgb`, using the tracked ROI when possible."""
+        h, w = rgb.shape[:2]
+        results = None
+        if self.roi is not None and self._roi_frames < self.full_frame_every:
+            results = self._process_roi(rgb, w, h)
+            self._roi_frames += 1
+
+        if results is None or not results.multi_hand_landmarks:
+            # Tracking lost (or periodic refresh): search the whole frame
+            results = self.hands.process(rgb)
+            self._roi_frames = 0
+
+        if results.multi_hand_landmarks:
+            self._update_roi(results.multi_hand_landmarks, w, h)
+        else:
+            self.roi = None
+        return results
+
+    def close(self):
+        """Release the crop Hands instance."""
+        self.crop_hands.close()
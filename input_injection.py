@@ -0,0 +1,204 @@
+"""
+VisioSense - Input Injection
+==================================================
+
+Mouse actions are sent from a dedicated worker thread, so slow OS input
+calls (and pyautogui's PAUSE after every call) never stall the frame loop.
+
+The frame loop only queues actions. Consecutive cursor moves collapse into
+the latest target and consecutive scrolls are summed. Clicks, presses and
+releases keep their order relative to everything else, so drags still
+start and end where they should.
+
+Backends:
+- "pyautogui": real mouse control
+- "null":      discard every action (headless servers, benchmarks)
+- "recording": keep a timestamped log of actions for tests and benchmarks
+"""
+
+import collections
+import threading
+import time
+
+import metrics
+
+# Try to import pyautogui, if not available (e.g. no display), disable mouse control
+try:
+    import pyautogui
+    # Disable pyautogui failsafe for better gesture control
+    pyautogui.FAILSAFE = False
+    PYAUTOGUI_AVAILABLE = True
+except Exception:
+    print("⚠️  pyautogui not available. Mouse control will be disabled.")
+    PYAUTOGUI_AVAILABLE = False
+    pyautogui = None
+
+InputAction = collections.namedtuple('InputAction', ['kind', 'args', 'timestamp'])
+
+ACTIONS = ("move", "click", "mouse_down", "mouse_up", "scroll")
+
+
+class NullBackend:
+    """Discard every action."""
+
+    name = "null"
+
+    def __init__(self, screen_size=(1920, 1080)):
+        self.screen_size = screen_size
+
+    def size(self):
+        return self.screen_size
+
+    def perform(self, action):
+        pass
+
+
+class RecordingBackend(NullBackend):
+    """Record every action with the time it was performed."""
+
+    name = "recording"
+
+    def __init__(self, screen_size=(1920, 1080), latency=0.0):
+        super().__init__(screen_size)
+        self.latency = latency
+        self.actions = []
+
+    def perform(self, action):
+        if self.latency:
+            # Simulate a slow OS input call
+            time.sleep(self.latency)
+        self.actions.append((time.time(), action))
+
+
+class PyAutoGUIBackend:
+    """Real mouse control through pyautogui.
+
+    `pause` replaces pyautogui's sleep after every call (0.1 s by default,
+    which would cap the cursor at ~10 updates per second); None keeps it.
+    """
+
+    name = "pyautogui"
+
+    def __init__(self, pause=0.0):
+        if not PYAUTOGUI_AVAILABLE:
+            raise RuntimeError("pyautogui is not available")
+        if pause is not None:
+            pyautogui.PAUSE = pause
+
+    def size(self):
+        return pyautogui.size()
+
+    def perform(self, action):
+        if action.kind == "move":
+            pyautogui.moveTo(*action.args)
+        elif action.kind == "click":
+            pyautogui.click()
+        elif action.kind == "mouse_down":
+            pyautogui.mouseDown()
+        elif action.kind == "mouse_up":
+            pyautogui.mouseUp()
+        elif action.kind == "scroll":
+            pyautogui.scroll(*action.args)
+
+
+BACKENDS = {
+    "pyautogui": PyAutoGUIBackend,
+    "null": NullBackend,
+    "recording": RecordingBackend,
+}
+
+
+def create_backend(name=None):
+    """Create an input backend by name; by default pyautogui if available, else null."""
+    if name is None:
+        name = "pyautogui" if PYAUTOGUI_AVAILABLE else "null"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown input backend: {name}")
+    return BACKENDS[name]()
+
+
+class InputInjector:
+    """Perform queued mouse actions on a background thread."""
+
+    def __init__(self, backend=None):
+        if backend is None or isinstance(backend, str):
+            backend = create_backend(backend)
+        self.backend = backend
+        self.coalesced = 0
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="visiosense-input", daemon=True)
+        self._thread.start()
+
+    def submit(self, kind, *args):
+        """Queue an action; never blocks on the backend."""
+        if kind not in ACTIONS:
+            raise ValueError(f"Unknown input action: {kind}")
+        with self._cond:
+            last = self._pending[-1] if self._pending else None
+            if last is not None and last.kind == kind == "move":
+                # Only the latest cursor target matters
+                self._pending[-1] = InputAction(kind, args, time.time())
+                self.coalesced += 1
+            elif last is not None and last.kind == kind == "scroll":
+                self._pending[-1] = InputAction(kind, (last.args[0] + args[0],), last.timestamp)
+                self.coalesced += 1
+            else:
+                self._pending.append(InputAction(kind, args, time.time()))
+            self._cond.notify()
+
+    def move(self, x, y):
+        self.submit("move", x, y)
+
+    def click(self):
+        self.submit("click")
+
+    def mouse_down(self):
+        self.submit("mouse_down")
+
+    def mouse_up(self):
+        self.submit("mouse_up")
+
+    def scroll(self, amount):
+        self.submit("scroll", int(amount))
+
+    def size(self):
+        """Screen size of the backend."""
+        return self.backend.size()
+
+    def pending(self):
+        """Number of actions waiting to be performed."""
+        with self._cond:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or not self._running)
+                if not self._pending:
+                    break
+                action = self._pending.popleft()
+                self._busy = True
+            try:
+                with metrics.INPUT_ACTION_SECONDS.labels(action=action.kind).time():
+                    self.backend.perform(action)
+            except Exception:
+                pass
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until every queued action has been performed."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def stop(self, timeout=2.0):
+        """Perform the remaining actions, then stop the worker."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
@@ -0,0 +1,249 @@
+"""
+VisioSense - Metrics
+==================================================
+
+Lightweight counters, gauges and histograms for the hot path, rendered
+in the Prometheus text exposition format for the `/metrics` endpoint.
+
+Updates take a single uncontended lock, so they are cheap enough to call
+on every frame. No external dependency is needed.
+"""
+
+import bisect
+import contextlib
+import threading
+import time
+
+# Latency buckets in seconds, from sub-millisecond input calls to slow YOLO frames
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    """Base class: a metric family with optional labels."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # Export unlabeled metrics as soon as they exist
+            self.labels()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, **labelvalues):
+        """Return the child metric for the given label values."""
+        key = tuple(str(labelvalues[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, labelnames, key):
+        return [f"{name}{_format_labels(labelnames, key)} {self.value}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value (frames, bytes, ...)."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self._fn = None
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        self.inc(-amount)
+
+    def set_function(self, fn):
+        """Compute the value with `fn()` at collection time (e.g. queue depths)."""
+        self._fn = fn
+
+    def get(self):
+        if self._fn is not None:
+            try:
+                return self._fn()
+            except Exception:
+                return float("nan")
+        return self.value
+
+    def render(self, name, labelnames, key):
+        return [f"{name}{_format_labels(labelnames, key)} {self.get()}"]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (FPS, queue depth, clients, ...)."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default().dec(amount)
+
+    def get(self):
+        return self._default().get()
+
+    def remove(self, **labelvalues):
+        key = tuple(str(labelvalues[name]) for name in self.labelnames)
+        with self._lock:
+            self._children.pop(key, None)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextlib.contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self, name, labelnames, key):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{_format_labels(labelnames, key, ('le', le))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, key)} {total}")
+        lines.append(f"{name}_count{_format_labels(labelnames, key)} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets (latencies)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for `/metrics`."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+FRAMES_CAPTURED = Counter("visiosense_frames_captured_total",
+                          "Frames read from the camera or frame source.", registry=REGISTRY)
+FRAMES_PROCESSED = Counter("visiosense_frames_processed_total",
+                           "Frames processed by the gesture engine.", registry=REGISTRY)
+FRAMES_DROPPED = Counter("visiosense_frames_dropped_total",
+                         "Frames dropped by frame bus subscribers.", ["topic"], registry=REGISTRY)
+INFERENCE_SECONDS = Histogram("visiosense_inference_seconds",
+                              "Per-model inference time.", ["model"], registry=REGISTRY)
+FRAME_SECONDS = Histogram("visiosense_frame_seconds",
+                          "End-to-end engine time per frame.", registry=REGISTRY)
+ENGINE_FPS = Gauge("visiosense_engine_fps", "Smoothed engine frame rate.", registry=REGISTRY)
+QUEUE_DEPTH = Gauge("visiosense_queue_depth", "Items waiting in internal queues.", ["queue"],
+                    registry=REGISTRY)
+STREAM_CLIENTS = Gauge("visiosense_stream_clients", "Connected video stream clients.", registry=REGISTRY)
+JPEG_BYTES_SENT = Counter("visiosense_jpeg_bytes_sent_total",
+                          "JPEG bytes sent to stream clients.", registry=REGISTRY)
+STREAM_LATENCY_SECONDS = Histogram("visiosense_stream_latency_seconds",
+                                   "Capture-to-display latency reported by WebSocket stream clients.",
+                                   registry=REGISTRY)
+INPUT_ACTION_SECONDS = Histogram("visiosense_input_action_seconds",
+                                 "Latency of mouse actions (pyautogui calls).", ["action"],
+                                 registry=REGISTRY)
+VOICE_SEGMENTS = Counter("visiosense_voice_segments_total",
+                         "Speech segments passed to the voice recognizer.", registry=REGISTRY)
@@ -0,0 +1,105 @@
+"""
+VisioSense - Model Registry
+==================================================
+
+Lazy, thread-safe loading of the heavy models and libraries (MediaPipe,
+YOLOv8, ...). Nothing is imported or built at module import time: each
+entry is loaded on first use, or ahead of time by a background warm-up
+thread, so the web server can come up instantly while models load.
+
+Every entry reports its state ("pending", "loading", "ready", "failed")
+and how long it took to load.
+"""
+
+import threading
+import time
+
+
+class ModelRegistry:
+    """Registry of lazily loaded models keyed by name."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, description=None):
+        """Register `loader` (a zero-argument callable) under `name`."""
+        with self._lock:
+            self._entries[name] = {
+                "loader": loader,
+                "description": description or name,
+                "state": "pending",
+                "model": None,
+                "error": None,
+                "load_time": None,
+                "event": threading.Event(),
+            }
+
+    def _load(self, name):
+        with self._lock:
+            entry = self._entries[name]
+            if entry["state"] != "pending":
+                return entry
+            entry["state"] = "loading"
+
+        print(f"Loading {entry['description']}...")
+        start = time.perf_counter()
+        try:
+            entry["model"] = entry["loader"]()
+            entry["state"] = "ready"
+            print(f"✓ {entry['description']} loaded in {time.perf_counter() - start:.2f}s!")
+        except Exception as e:
+            entry["error"] = str(e)
+            entry["state"] = "failed"
+            print(f"⚠️  {entry['description']} not available: {e}")
+        entry["load_time"] = time.perf_counter() - start
+        entry["event"].set()
+        return entry
+
+    def get(self, name, wait=True, timeout=None):
+        """Return the model called `name`, loading it on first use.
+
+        Returns None if the model failed to load. With `wait=False` the
+        call never blocks: a model that is not ready yet is queued for a
+        background load and None is returned.
+        """
+        entry = self._entries[name]
+        if not entry["event"].is_set():
+            if not wait:
+                self.warm_up([name])
+                return None
+            self._load(name)
+            entry["event"].wait(timeout)
+        return entry["model"]
+
+    def is_ready(self, name):
+        """Check whether `name` has finished loading successfully."""
+        return self._entries[name]["state"] == "ready"
+
+    def warm_up(self, names=None):
+        """Load `names` (default: all pending models) in a background thread."""
+        if names is None:
+            names = list(self._entries)
+        pending = [name for name in names if self._entries[name]["state"] == "pending"]
+        if not pending:
+            return None
+
+        def load_all():
+            for name in pending:
+                self._load(name)
+
+        thread = threading.Thread(target=load_all, name="visiosense-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        """Return a JSON-serializable readiness report for every model."""
+        return {
+            name: {
+                "description": entry["description"],
+                "state": entry["state"],
+                "load_time": entry["load_time"],
+                "error": entry["error"],
+            }
+            for name, entry in self._entries.items()
+        }
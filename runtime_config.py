@@ -0,0 +1,122 @@
+"""
+VisioSense - Runtime Config
+==================================================
+
+Versioned, thread-safe settings that can change while the pipeline runs.
+
+Settings are grouped in sections ({"input": {"pinch_threshold": 0.04}, ...}).
+Any thread may call `update()`; every accepted change bumps `version`. The
+frame loop compares versions once per frame and, when they differ, takes
+a consistent `snapshot()` and applies it before processing the next frame,
+so a frame never sees half an update and nothing has to restart.
+
+Values are converted to the type of their default, and an optional
+`validate` callable checks the complete candidate settings (ranges,
+choices, combinations) before anything is applied, so a bad request is
+rejected up front instead of failing in the frame loop.
+"""
+
+import copy
+import threading
+
+
+def _coerce(value, default):
+    """Convert `value` to the type of `default` (None defaults accept numbers or None)."""
+    if default is None or value is None:
+        return None if value in (None, "", "none", "null") else float(value)
+    if isinstance(default, bool):
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+    if isinstance(default, int):
+        return int(float(value))
+    if isinstance(default, float):
+        return float(value)
+    if isinstance(default, str):
+        return str(value)
+    if isinstance(default, dict) and not isinstance(value, dict):
+        raise ValueError(f"expected a mapping, got {value!r}")
+    if isinstance(default, (list, tuple)) and not isinstance(value, (list, tuple)):
+        raise ValueError(f"expected a list, got {value!r}")
+    return value
+
+
+class RuntimeConfig:
+    """Sections of settings with a version number that changes on every update.
+
+    `validate(settings)` receives a copy of the complete settings as they
+    would be after an update and raises ValueError to reject it.
+    """
+
+    def __init__(self, defaults, validate=None):
+        self._defaults = copy.deepcopy(defaults)
+        self._values = copy.deepcopy(defaults)
+        self._validate = validate
+        self._lock = threading.Lock()
+        self._version = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def get(self, section, key=None):
+        """Return a copy of a section, or a single value."""
+        with self._lock:
+            if key is None:
+                return copy.deepcopy(self._values[section])
+            return copy.deepcopy(self._values[section][key])
+
+    def snapshot(self):
+        """Return (version, settings) as one consistent copy."""
+        with self._lock:
+            return self._version, copy.deepcopy(self._values)
+
+    def update(self, changes):
+        """Apply {section: {key: value}} changes and return the new version.
+
+        Unknown sections or keys raise KeyError; values are converted to the
+        type of their default and raise ValueError if they can't be or if
+        `validate` rejects the result. Nothing is applied unless every
+        change is valid.
+        """
+        with self._lock:
+            converted = []
+            for section, values in changes.items():
+                if section not in self._defaults:
+                    raise KeyError(f"Unknown settings section: {section}")
+                for key, value in values.items():
+                    if key not in self._defaults[section]:
+                        raise KeyError(f"Unknown setting: {section}.{key}")
+                    try:
+                        converted.append((section, key, _coerce(value, self._defaults[section][key])))
+                    except (ValueError, TypeError) as e:
+                        raise ValueError(f"Invalid value for {section}.{key}: {e}")
+
+            if self._validate is not None:
+                candidate = copy.deepcopy(self._values)
+                for section, key, value in converted:
+                    candidate[section][key] = value
+                self._validate(candidate)
+
+            changed = False
+            for section, key, value in converted:
+                if self._values[section][key] != value:
+                    self._values[section][key] = value
+                    changed = True
+            if changed:
+                self._version += 1
+            return self._version
+
+    def restore(self, values):
+        """Replace all settings with `values` (e.g. a snapshot to roll back to); returns the new version."""
+        with self._lock:
+            self._values = copy.deepcopy(values)
+            self._version += 1
+            return self._version
+
+    def reset(self):
+        """Restore the defaults."""
+        with self._lock:
+            self._values = copy.deepcopy(self._defaults)
+            self._version += 1
+            return self._version
@@ -0,0 +1,320 @@
+"""
+VisioSense - Sessions
+==================================================
+
+Run several independent gesture pipelines (one per camera or video
+source) from one server.
+
+Each session is a worker process with its own MediaPipe/YOLO models,
+RuntimeConfig, capture and frame bus, so sessions never share the GIL
+with each other or with the web server. The manager pins every session
+to its own set of CPU cores, least-used cores first. In the server
+process each session gets its own FrameBus and MJPEGBroadcaster fed with
+the worker's annotated frames, plus a stream of status deltas.
+
+Frames come back through a SharedFrameRing created by the server: the
+worker writes each annotated frame into shared memory and the server
+copies it out once, instead of pickling it through a pipe. Only small
+status and control messages use queues.
+
+Workers default to the "null" input backend and voice commands off:
+several cameras must not fight over one mouse or microphone.
+"""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+from frame_bus import FrameBus
+from shared_frames import SharedFrameRing
+from streaming import MJPEGBroadcaster
+from visiosense import DEFAULT_SETTINGS
+
+# Frame slots hold at least 720p BGR, so capture size changes rarely need downscaling
+MIN_SLOT_BYTES = 1280 * 720 * 3
+
+
+def available_cores():
+    """CPU cores this process may run on."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def _fit(frame, capacity):
+    """Downscale `frame` until it fits a ring slot of `capacity` bytes."""
+    if frame.nbytes <= capacity:
+        return frame
+    scale = (capacity / frame.nbytes) ** 0.5
+    height, width = frame.shape[:2]
+    return cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+
+def _session_worker(session_id, source, overrides, input_backend, cores,
+                    ring_spec, status_queue, control_queue, stop_event):
+    """Worker process: capture + engine for one session."""
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    cv2.setNumThreads(len(cores) if cores else 0)
+
+    import visiosense
+    from frame_bus import CameraPublisher
+    from frame_sources import open_source
+    from runtime_config import RuntimeConfig
+    from status_events import StatusPublisher
+
+    config = RuntimeConfig(visiosense.DEFAULT_SETTINGS, validate=visiosense.validate_settings)
+    # There is one microphone, so sessions only listen when asked to
+    config.update({"voice": {"enabled": False}})
+    if overrides:
+        config.update(overrides)
+
+    bus = FrameBus()
+    try:
+        if isinstance(source, int) or str(source).isdigit():
+            camera = CameraPublisher(bus, device=int(source), config=config)
+        else:
+            camera = CameraPublisher(bus, source=open_source(source, realtime=True), config=config)
+    except (OSError, ValueError) as e:
+        status_queue.put({"error": f"Cannot open source {source}: {e}"})
+        return
+    if not camera.start():
+        status_queue.put({"error": f"Cannot open source: {source}"})
+        return
+
+    engine_stop = threading.Event()
+    ring = SharedFrameRing.attach(**ring_spec)
+
+    def forward_frames(subscription):
+        # The server always takes the newest frame, so nothing queues up here
+        while True:
+            item = subscription.get()
+            if item is None:
+                break
+            ring.write(_fit(item.frame, ring.capacity), item.timestamp)
+
+    def handle_control():
+        while not engine_stop.is_set():
+            if stop_event.is_set():
+                engine_stop.set()
+                break
+            try:
+                changes = control_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            try:
+                config.update(changes)
+            except (KeyError, ValueError, TypeError) as e:
+                status_queue.put({"error": str(e)})
+
+    status = StatusPublisher(status_queue.put, config=config)
+    forwarder = threading.Thread(target=forward_frames, args=(bus.subscribe("annotated"),), daemon=True)
+    forwarder.start()
+    threading.Thread(target=handle_control, daemon=True).start()
+    status.update(session=session_id, running=True)
+    status.start()
+    try:
+        visiosense.main(web_mode=True, frame_bus=bus, headless=True, on_result=status.on_result,
+                        stop_event=engine_stop, input_backend=input_backend, config=config)
+    finally:
+        engine_stop.set()
+        camera.stop()
+        bus.close()
+        forwarder.join(timeout=2.0)
+        ring.close()
+        status.update(running=False)
+        status.flush()
+        status.stop()
+
+
+class EngineSession:
+    """Server-side handle of one session worker process."""
+
+    def __init__(self, session_id, source, cores, settings=None, input_backend="null",
+                 on_status=None, context=None, slots=3):
+        context = context or multiprocessing.get_context("spawn")
+        self.id = session_id
+        self.source = source
+        self.cores = cores
+        self.on_status = on_status
+        self.started = time.time()
+        # Until start() runs there is no process yet, so it can't be dead
+        self.starting = True
+        # Written by the status thread, read by request handlers
+        self.status = {}
+        self._status_lock = threading.Lock()
+        self.bus = FrameBus()
+        self.broadcaster = MJPEGBroadcaster(self.bus, topic="annotated")
+        capture = dict(DEFAULT_SETTINGS["capture"], **(settings or {}).get("capture", {}))
+        capacity = max(int(capture["width"]) * int(capture["height"]) * 3, MIN_SLOT_BYTES)
+        self.ring = SharedFrameRing.create(capacity, slots=slots, context=context)
+        self._statuses = context.Queue()
+        self._control = context.Queue()
+        self._stop = context.Event()
+        self._frames_thread = None
+        self.process = context.Process(
+            target=_session_worker, name=f"visiosense-session-{session_id}", daemon=True,
+            args=(session_id, source, settings or {}, input_backend, cores,
+                  self.ring.spec(), self._statuses, self._control, self._stop))
+
+    def start(self):
+        self.process.start()
+        self.starting = False
+        self._frames_thread = threading.Thread(target=self._receive_frames, name=f"session-{self.id}-frames",
+                                               daemon=True)
+        self._frames_thread.start()
+        threading.Thread(target=self._receive_status, name=f"session-{self.id}-status", daemon=True).start()
+        return self
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def _receive_frames(self):
+        seq = 0
+        while self.alive:
+            newest = self.ring.wait(seq, timeout=0.5)
+            if newest is None:
+                continue
+            seq = newest
+            item = self.ring.read(seq)
+            if item is None:
+                continue
+            timestamp, view = item
+            # Subscribers keep frames around, so take them out of the ring
+            frame = view.copy()
+            del item, view
+            if self.ring.valid(seq):
+                self.bus.publish("annotated", frame, timestamp=timestamp)
+        self.bus.close()
+
+    def _receive_status(self):
+        while self.alive or not self._statuses.empty():
+            try:
+                delta = self._statuses.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self._status_lock:
+                self.status.update(delta)
+            if self.on_status is not None:
+                self.on_status(self.id, delta)
+
+    def update_settings(self, changes):
+        """Send settings changes to the worker's RuntimeConfig."""
+        self._control.put(changes)
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if not self.starting:
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(1.0)
+        self.broadcaster.stop()
+        self.bus.close()
+        if self._frames_thread is not None:
+            self._frames_thread.join(timeout=2.0)
+            self._frames_thread = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def status_snapshot(self):
+        """A copy of the latest status, without the event log."""
+        with self._status_lock:
+            return {key: value for key, value in self.status.items() if key != "events"}
+
+    def info(self):
+        return {
+            "id": self.id,
+            "source": self.source,
+            "cores": self.cores,
+            "pid": self.process.pid,
+            "alive": self.alive,
+            "uptime": round(time.time() - self.started, 1),
+            "status": self.status_snapshot(),
+        }
+
+
+class SessionManager:
+    """Start, stop and list engine sessions, spreading them across CPU cores."""
+
+    def __init__(self, cores_per_session=2, max_sessions=None, on_status=None):
+        self.cores = available_cores()
+        self.max_sessions = max_sessions
+        # More sessions than cores share them, least-used first
+        self.cores_per_session = min(cores_per_session, len(self.cores))
+        self.on_status = on_status
+        self._sessions = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _place(self):
+        """Pick the least-used cores for a new session."""
+        usage = {core: 0 for core in self.cores}
+        for session in self._sessions.values():
+            for core in session.cores:
+                usage[core] += 1
+        return sorted(self.cores, key=lambda core: (usage[core], core))[:self.cores_per_session]
+
+    def start(self, source=0, settings=None, input_backend="null", session_id=None):
+        """Start a session for `source` (camera index, video file, folder or "synthetic")."""
+        dead = []
+        try:
+            with self._lock:
+                dead = self._reap()
+                if self.max_sessions is not None and len(self._sessions) >= self.max_sessions:
+                    raise RuntimeError(f"Session limit reached ({self.max_sessions})")
+                session_id = str(session_id or next(self._ids))
+                if session_id in self._sessions:
+                    raise ValueError(f"Session {session_id} already exists")
+                session = EngineSession(session_id, source, self._place(), settings, input_backend,
+                                        on_status=self.on_status)
+                self._sessions[session_id] = session
+        finally:
+            # Stopping joins processes and threads, so it happens outside the lock
+            for old in dead:
+                old.stop()
+        try:
+            return session.start()
+        except Exception:
+            with self._lock:
+                self._sessions.pop(session_id, None)
+            session.stop()
+            raise
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(str(session_id))
+
+    def stop(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(str(session_id), None)
+        if session is None:
+            return False
+        session.stop()
+        return True
+
+    def list(self):
+        with self._lock:
+            return [session.info() for session in self._sessions.values()]
+
+    def stop_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.stop()
+
+    def _reap(self):
+        """Forget sessions whose source ran out or that crashed; returns them for stopping."""
+        dead = [session_id for session_id, session in self._sessions.items()
+                if not session.starting and not session.alive]
+        return [self._sessions.pop(session_id) for session_id in dead]
@@ -0,0 +1,170 @@
+"""
+VisioSense - Shared Frames
+==================================================
+
+A ring buffer of video frames in `multiprocessing.shared_memory`, so that
+frames cross process boundaries without pickling or copying through a
+pipe.
+
+The ring has a fixed number of slots, each big enough for `capacity`
+bytes of uint8 pixels. The writer stores frame N in slot N % slots and
+stamps the slot with its sequence number; readers in other processes get
+a NumPy view straight into shared memory. A slot's sequence number is
+cleared while it is being written, so readers can tell when the writer
+lapped them: call `valid(seq)` after using a view and drop the result if
+it returns False.
+
+One process creates the ring (`SharedFrameRing.create`) and unlinks it
+when done; the others `attach()` with its `spec()`, which must be passed
+to them when they are started. The spec carries a multiprocessing
+Condition that the writer notifies after every frame, so `wait()` sleeps
+until a frame arrives instead of polling.
+"""
+
+import multiprocessing
+import time
+
+import numpy as np
+from multiprocessing import shared_memory
+
+# Slots start on cache-line boundaries
+_ALIGN = 64
+# Per-slot header: sequence number, timestamp (as float64 bits), height, width, channels
+_SLOT_FIELDS = 5
+_WRITING = -1
+
+
+def _aligned(size):
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class SharedFrameRing:
+    """Fixed-size frame slots with sequence numbers in shared memory."""
+
+    def __init__(self, shm, slots, capacity, owner, condition=None):
+        self.shm = shm
+        self.slots = slots
+        self.capacity = capacity
+        self.owner = owner
+        self.condition = condition
+        header_size = _aligned(8 * (1 + _SLOT_FIELDS * slots))
+        # [0] is the last written sequence number, then one row per slot
+        self._header = np.ndarray((1 + _SLOT_FIELDS * slots,), dtype=np.int64, buffer=shm.buf)
+        self._meta = self._header[1:].reshape(slots, _SLOT_FIELDS)
+        self._times = self._meta[:, 1].view(np.float64)
+        self._data = np.ndarray((slots, _aligned(capacity)), dtype=np.uint8, buffer=shm.buf,
+                                offset=header_size)
+
+    @classmethod
+    def create(cls, capacity, slots=4, name=None, context=None):
+        """Create a ring holding frames of up to `capacity` bytes."""
+        context = context or multiprocessing.get_context("spawn")
+        size = _aligned(8 * (1 + _SLOT_FIELDS * slots)) + slots * _aligned(capacity)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        ring = cls(shm, slots, capacity, owner=True, condition=context.Condition())
+        ring._header[:] = 0
+        ring._meta[:, 0] = _WRITING
+        return ring
+
+    @classmethod
+    def attach(cls, name, capacity, slots=4, condition=None):
+        """Open a ring created by another process."""
+        try:
+            # Only the creator may unlink it (Python 3.13+)
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Older Pythons register it again, which is harmless for child
+            # processes: they share the creator's resource tracker
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, slots, capacity, owner=False, condition=condition)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def spec(self):
+        """Arguments for `attach()` in another process."""
+        return {"name": self.name, "capacity": self.capacity, "slots": self.slots,
+                "condition": self.condition}
+
+    def fits(self, frame):
+        return frame.dtype == np.uint8 and frame.nbytes <= self.capacity
+
+    def write(self, frame, timestamp=None):
+        """Copy `frame` into the next slot and return its sequence number."""
+        if not self.fits(frame):
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit a {self.capacity}-byte slot")
+        seq = int(self._header[0]) + 1
+        slot = seq % self.slots
+        meta = self._meta[slot]
+        meta[0] = _WRITING
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 0
+        self._data[slot, :frame.nbytes].reshape(frame.shape)[...] = frame
+        meta[2:] = (height, width, channels)
+        self._times[slot] = time.time() if timestamp is None else timestamp
+        meta[0] = seq
+        if self.condition is None:
+            self._header[0] = seq
+        else:
+            with self.condition:
+                self._header[0] = seq
+                self.condition.notify_all()
+        return seq
+
+    @property
+    def last_seq(self):
+        """Sequence number of the newest complete frame (0 before the first)."""
+        return int(self._header[0])
+
+    def read(self, seq):
+        """Return (timestamp, view) for frame `seq`, or None if it's gone or not written yet.
+
+        The view points into shared memory: check `valid(seq)` after using it.
+        """
+        slot = seq % self.slots
+        meta = self._meta[slot]
+        if seq <= 0 or meta[0] != seq:
+            return None
+        height, width, channels = (int(v) for v in meta[2:])
+        timestamp = float(self._times[slot])
+        shape = (height, width, channels) if channels else (height, width)
+        view = self._data[slot, :height * width * max(channels, 1)].reshape(shape)
+        if meta[0] != seq:
+            return None
+        return timestamp, view
+
+    def valid(self, seq):
+        """True while frame `seq` has not been overwritten."""
+        return seq > 0 and bool(self._meta[seq % self.slots, 0] == seq)
+
+    def wait(self, after_seq, timeout=None, poll=0.002):
+        """Wait for a frame newer than `after_seq`; returns the newest seq or None on timeout.
+
+        Rings attached without a condition fall back to polling every `poll` seconds.
+        """
+        if self.condition is not None:
+            with self.condition:
+                if not self.condition.wait_for(lambda: self.last_seq > after_seq, timeout):
+                    return None
+                return self.last_seq
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            seq = self.last_seq
+            if seq > after_seq:
+                return seq
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll)
+
+    def close(self):
+        """Release this process's mapping (and the segment itself if we created it)."""
+        # Views into the buffer must go before it can be closed
+        self._header = self._meta = self._times = self._data = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A caller still holds a frame view; the mapping goes when it does
+            pass
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,129 @@
+"""
+VisioSense - Status Events
+==================================================
+
+Throttled, delta-compressed live status for dashboard clients.
+
+The engine reports every frame through its `on_result` hook, but clients
+only need to hear about changes. StatusPublisher keeps the latest status
+(mode, gesture, finger counts, expression, head angle, objects, FPS, ...)
+and, at most `max_rate` times per second, emits one batched event with
+just the fields that changed since the last tick plus any gesture
+start/end events in between. The emit cost is per tick, not per frame,
+and one broadcast serves every viewer.
+"""
+
+import threading
+import time
+
+from visiosense import object_class_name
+
+
+def status_from_result(result):
+    """Reduce an engine result to display values that only change meaningfully."""
+    objects = result.get('objects')
+    names = sorted(object_class_name(class_id) for class_id in objects['class_id']) if objects is not None else []
+    resolution = result.get('resolution')
+    return {
+        'mode': result['mode'],
+        'gesture': result['gesture'] or "No Gesture",
+        'fingers': result['fingers'],
+        'total_fingers': result['total_fingers'],
+        'expression': result['expression'],
+        # Whole degrees and FPS: sub-unit noise would otherwise be a change every tick
+        'head_angle': round(result['head_angle']),
+        'cheating': result['cheating'],
+        'objects': names,
+        'fps': round(result.get('fps', 0.0)),
+        'resolution': f"{resolution[0]}x{resolution[1]}" if resolution else '-',
+    }
+
+
+class StatusPublisher:
+    """Batch engine status into at most `max_rate` delta events per second.
+
+    `emit(status)` is called from the publisher's own thread with a dict
+    of changed fields (and an 'events' list when gestures started or
+    ended). Every `keepalive` seconds the full status is sent so late or
+    lossy clients converge. With a RuntimeConfig as `config`, its
+    "status" section overrides `max_rate` and `keepalive` live.
+    """
+
+    def __init__(self, emit, max_rate=10.0, keepalive=5.0, config=None):
+        self.emit = emit
+        self.max_rate = max_rate
+        self.keepalive = keepalive
+        self.config = config
+        self.events_sent = 0
+        self._lock = threading.Lock()
+        self._state = {}
+        self._sent = {}
+        self._events = []
+        self._last_full = 0.0
+        self._running = False
+        self._thread = None
+
+    def on_result(self, result):
+        """Engine hook: record the latest result (cheap, called every frame)."""
+        status = status_from_result(result)
+        with self._lock:
+            self._state.update(status)
+            self._events.extend(result.get('gesture_events') or ())
+
+    def update(self, **fields):
+        """Set status fields directly (e.g. running=False when the engine stops)."""
+        with self._lock:
+            self._state.update(fields)
+
+    def snapshot(self):
+        """Full current status, for clients that just connected."""
+        with self._lock:
+            return dict(self._state)
+
+    def _delta(self, now):
+        with self._lock:
+            if now - self._last_full >= self.keepalive:
+                delta = dict(self._state)
+                self._last_full = now
+            else:
+                delta = {key: value for key, value in self._state.items() if self._sent.get(key) != value}
+            if self._events:
+                delta['events'] = self._events
+                self._events = []
+            self._sent.update(self._state)
+        return delta
+
+    def flush(self):
+        """Emit pending changes now; returns the emitted delta (or None)."""
+        delta = self._delta(time.time())
+        if not delta:
+            return None
+        self.emit(delta)
+        self.events_sent += 1
+        return delta
+
+    def _run(self):
+        while self._running:
+            if self.config is not None:
+                status_settings = self.config.get("status")
+                self.max_rate = status_settings["max_rate"]
+                self.keepalive = status_settings["keepalive"]
+            tick_start = time.perf_counter()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error sending status update: {e}")
+            time.sleep(max(0.0, 1.0 / max(self.max_rate, 0.1) - (time.perf_counter() - tick_start)))
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="visiosense-status", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
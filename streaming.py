@@ -0,0 +1,337 @@
+"""
+VisioSense - Video Streaming
+==================================================
+
+Encode-once video streaming for the web dashboard.
+
+MJPEGBroadcaster: a frame from the frame bus is JPEG-encoded once per
+distinct (quality, scale) variant, when the first client of that variant
+is due for it, and the shared buffer is handed to all of them. Variants
+whose clients are all throttled by `max_fps` cost nothing until one of
+them wants a frame. Clients block on a condition variable until a new
+frame is ready instead of polling, and the latest encoded frame doubles
+as a cached snapshot.
+
+SocketIOFrameStreamer: frames are pushed as binary JPEG/WebP messages over
+the dashboard's Socket.IO connection with credit-based backpressure. Each
+client holds a few credits; a frame is sent only while it has one, and it
+returns the credit by acking the frame's seq once it was displayed or
+dropped. Acks for unknown or already acked frames are ignored, and frames
+left unacked for `ack_timeout` seconds get their credit back, so a lost
+message can't stall the stream. A slow client therefore skips to the
+newest frame instead of queueing old ones. Every
+message carries the capture timestamp so the client can show the real
+glass-to-glass latency.
+"""
+
+import collections
+import threading
+import time
+
+import cv2
+
+import metrics
+
+DEFAULT_QUALITY = 80
+
+# Image formats for binary frame messages: (extension, quality flag)
+FRAME_FORMATS = {
+    "jpeg": ('.jpg', cv2.IMWRITE_JPEG_QUALITY),
+    "webp": ('.webp', cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+def encode_frame(frame, fmt="jpeg", quality=DEFAULT_QUALITY, scale=1.0):
+    """Encode `frame` as JPEG or WebP bytes, optionally resized by `scale`."""
+    extension, quality_flag = FRAME_FORMATS[fmt]
+    if scale != 1.0:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode(extension, frame, [quality_flag, int(quality)])
+    return buffer.tobytes() if ok else None
+
+
+def encode_jpeg(frame, quality=DEFAULT_QUALITY, scale=1.0):
+    """Encode `frame` as JPEG bytes, optionally resized by `scale`."""
+    return encode_frame(frame, "jpeg", quality, scale)
+
+
+def mjpeg_part(jpeg):
+    """Wrap JPEG bytes as one part of a multipart/x-mixed-replace stream."""
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+
+
+class MJPEGBroadcaster:
+    """Serve one topic of a FrameBus to any number of MJPEG clients."""
+
+    def __init__(self, bus, topic="annotated"):
+        self.bus = bus
+        self.topic = topic
+        self.frames_encoded = 0
+        self.bytes_sent = 0
+        self._cond = threading.Condition()
+        self._clients = collections.Counter()
+        self._encoded = {}
+        # Variants some thread is encoding right now; others wait for its result
+        self._encoding = set()
+        self._frame = None
+        self._running = True
+        self._subscription = bus.subscribe(topic, policy="latest")
+        self._thread = threading.Thread(target=self._run, name="visiosense-mjpeg", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._subscription.get()
+            if item is None:
+                break
+            # Clients encode on demand when they are due for a frame
+            with self._cond:
+                self._frame = item
+                self._cond.notify_all()
+
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def _encoded_latest(self, variant):
+        """Return (seq, jpeg) of the latest frame for `variant`, encoding it if needed."""
+        with self._cond:
+            while True:
+                item = self._frame
+                if item is None:
+                    return None
+                cached = self._encoded.get(variant)
+                if cached is not None and cached[0] == item.seq:
+                    return cached
+                if variant not in self._encoding:
+                    break
+                # Another client of this variant is encoding it; share its result
+                self._cond.wait(timeout=1.0)
+            self._encoding.add(variant)
+
+        jpeg = None
+        try:
+            jpeg = encode_jpeg(item.frame, *variant)
+        finally:
+            with self._cond:
+                self._encoding.discard(variant)
+                if jpeg is not None:
+                    self.frames_encoded += 1
+                    current = self._encoded.get(variant)
+                    # Only cache variants a client streams: snapshot-only variants come
+                    # from the query string and would grow the cache without bound
+                    if variant in self._clients and (current is None or current[0] < item.seq):
+                        self._encoded[variant] = (item.seq, jpeg)
+                self._cond.notify_all()
+        if jpeg is None:
+            return None
+        return item.seq, jpeg
+
+    @property
+    def client_count(self):
+        with self._cond:
+            return sum(self._clients.values())
+
+    @property
+    def running(self):
+        return self._running
+
+    def snapshot(self, quality=DEFAULT_QUALITY, scale=1.0):
+        """Return the latest frame as JPEG bytes (shared with streams of the same variant), or None."""
+        entry = self._encoded_latest((quality, scale))
+        return entry[1] if entry else None
+
+    def stream(self, quality=DEFAULT_QUALITY, scale=1.0, max_fps=None):
+        """Yield multipart MJPEG parts for one client until the stream ends."""
+        variant = (quality, scale)
+        min_interval = 1.0 / max_fps if max_fps else 0.0
+        with self._cond:
+            self._clients[variant] += 1
+        metrics.STREAM_CLIENTS.inc()
+
+        last_seq = 0
+        try:
+            while True:
+                # Block until a newer frame than the one we sent is available
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: not self._running or (self._frame is not None and self._frame.seq > last_seq),
+                        timeout=1.0)
+                    if not self._running:
+                        break
+                    if self._frame is None or self._frame.seq <= last_seq:
+                        continue
+
+                entry = self._encoded_latest(variant)
+                if entry is None:
+                    continue
+                last_seq, jpeg = entry
+                self.bytes_sent += len(jpeg)
+                metrics.JPEG_BYTES_SENT.inc(len(jpeg))
+                sent_at = time.perf_counter()
+                yield mjpeg_part(jpeg)
+
+                if min_interval:
+                    remaining = min_interval - (time.perf_counter() - sent_at)
+                    if remaining > 0:
+                        time.sleep(remaining)
+        finally:
+            metrics.STREAM_CLIENTS.dec()
+            with self._cond:
+                self._clients[variant] -= 1
+                if self._clients[variant] <= 0:
+                    del self._clients[variant]
+                    self._encoded.pop(variant, None)
+
+    def stop(self):
+        """Stop broadcasting and end every client stream."""
+        self._subscription.close()
+        self._thread.join(timeout=2.0)
+
+
+class SocketIOFrameStreamer:
+    """Push one topic of a FrameBus to Socket.IO clients with credit-based backpressure."""
+
+    def __init__(self, socketio, bus, topic="annotated", event="video_frame", max_credits=4,
+                 ack_timeout=2.0):
+        self.socketio = socketio
+        self.bus = bus
+        self.topic = topic
+        self.event = event
+        self.max_credits = max_credits
+        self.ack_timeout = ack_timeout
+        self.frames_encoded = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._encoded = {}
+        self._frame = None
+        self._running = True
+        self._subscription = bus.subscribe(topic, policy="latest")
+        self._thread = threading.Thread(target=self._run, name="visiosense-ws-stream", daemon=True)
+        self._thread.start()
+
+    @property
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
+
+    @property
+    def running(self):
+        return self._running
+
+    def add_client(self, sid, fmt="jpeg", quality=DEFAULT_QUALITY, scale=1.0, credits=2):
+        """Start streaming to `sid`; it may have `credits` frames in flight."""
+        if fmt not in FRAME_FORMATS:
+            raise ValueError(f"Unknown frame format: {fmt}")
+        with self._lock:
+            self._clients[sid] = {
+                "variant": (fmt, quality, scale),
+                "credits": max(1, min(int(credits), self.max_credits)),
+                # seq -> send time of every frame not acked yet
+                "in_flight": {},
+                "last_seq": 0,
+            }
+        metrics.STREAM_CLIENTS.inc()
+        # Send the current frame right away instead of waiting for the next one
+        self._send(sid)
+
+    def remove_client(self, sid):
+        with self._lock:
+            client = self._clients.pop(sid, None)
+            if client is not None and not any(c["variant"] == client["variant"]
+                                              for c in self._clients.values()):
+                self._encoded.pop(client["variant"], None)
+        if client is not None:
+            metrics.STREAM_CLIENTS.dec()
+
+    def ack(self, sid, seq, latency=None):
+        """Return the credit of frame `seq` (displayed or dropped by `sid`) and send the newest frame."""
+        with self._lock:
+            client = self._clients.get(sid)
+            # Unknown, repeated or expired acks don't add credits
+            if client is None or client["in_flight"].pop(seq, None) is None:
+                return
+        if latency is not None:
+            metrics.STREAM_LATENCY_SECONDS.observe(latency)
+        self._send(sid)
+
+    def _encoded_frame(self, item, variant):
+        with self._lock:
+            cached = self._encoded.get(variant)
+        if cached is not None and cached[0] == item.seq:
+            return cached[1]
+        data = encode_frame(item.frame, *variant)
+        if data is None:
+            return None
+        with self._lock:
+            self.frames_encoded += 1
+            current = self._encoded.get(variant)
+            if current is None or current[0] < item.seq:
+                self._encoded[variant] = (item.seq, data)
+        return data
+
+    def _has_credit(self, client, now):
+        # Frames that were never acked (lost message, closed tab) give their credit back
+        in_flight = client["in_flight"]
+        for seq in [seq for seq, sent in in_flight.items() if now - sent > self.ack_timeout]:
+            del in_flight[seq]
+        return len(in_flight) < client["credits"]
+
+    def _send(self, sid):
+        with self._lock:
+            client = self._clients.get(sid)
+            item = self._frame
+            if (client is None or item is None or item.seq <= client["last_seq"]
+                    or not self._has_credit(client, time.monotonic())):
+                return
+            # Take the credit before encoding so concurrent sends can't overspend it
+            client["in_flight"][item.seq] = time.monotonic()
+            client["last_seq"] = item.seq
+            variant = client["variant"]
+
+        data = self._encoded_frame(item, variant)
+        if data is None:
+            with self._lock:
+                client["in_flight"].pop(item.seq, None)
+            return
+        self.frames_sent += 1
+        metrics.JPEG_BYTES_SENT.inc(len(data))
+        self.socketio.emit(self.event, {
+            "seq": item.seq,
+            "timestamp": item.timestamp,
+            "sent": time.time(),
+            "format": variant[0],
+            "frame": data,
+        }, to=sid)
+
+    def _run(self):
+        while True:
+            item = self._subscription.get()
+            if item is None:
+                break
+            with self._lock:
+                previous = self._frame
+                self._frame = item
+                sids = list(self._clients)
+                # Clients without credit never got the frame being replaced
+                if previous is not None:
+                    for client in self._clients.values():
+                        if len(client["in_flight"]) >= client["credits"] and client["last_seq"] < previous.seq:
+                            self.frames_dropped += 1
+                            metrics.FRAMES_DROPPED.labels(topic="websocket").inc()
+            for sid in sids:
+                self._send(sid)
+        self._running = False
+
+    def stop(self):
+        """Stop streaming; clients stay connected and can subscribe again later."""
+        self._subscription.close()
+        self._thread.join(timeout=2.0)
+        with self._lock:
+            count = len(self._clients)
+            self._clients.clear()
+            self._encoded.clear()
+        metrics.STREAM_CLIENTS.dec(count)
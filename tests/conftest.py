@@ -0,0 +1,27 @@
+import os
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_wav(tmp_path):
+    """Write a 16 kHz mono WAV of `seconds` with 440 Hz tone bursts at the given (start, end) times."""
+    def make(seconds, bursts, name="speech.wav", sample_rate=16000, amplitude=6000):
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        samples = np.zeros_like(t)
+        for start, end in bursts:
+            inside = (t >= start) & (t < end)
+            samples[inside] = amplitude * np.sin(2 * np.pi * 440 * t[inside])
+        path = tmp_path / name
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(samples.astype(np.int16).tobytes())
+        return str(path)
+    return make
@@ -0,0 +1,47 @@
+"""Headless runs of the full frame loop over synthetic frames (needs MediaPipe)."""
+
+import pytest
+
+import visiosense
+from frame_sources import SyntheticSource
+from input_injection import RecordingBackend
+from runtime_config import RuntimeConfig
+
+
+@pytest.fixture(scope="module", autouse=True)
+def mediapipe():
+    if visiosense.models.get("mediapipe") is None:
+        pytest.skip("MediaPipe not available")
+
+
+def engine_config(**changes):
+    config = RuntimeConfig(visiosense.DEFAULT_SETTINGS, validate=visiosense.validate_settings)
+    config.update(dict({"voice": {"enabled": False}, "objects": {"async": False}}, **changes))
+    return config
+
+
+def run(source, config):
+    backend = RecordingBackend()
+    results = []
+    visiosense.main(headless=True, source=source, input_backend=backend, on_result=results.append,
+                    config=config)
+    return results, backend
+
+
+def test_every_frame_produces_a_result_and_no_input_without_hands():
+    results, backend = run(SyntheticSource(320, 240, count=30), engine_config())
+    assert len(results) == 30
+    assert results[-1]["resolution"] == (320, 240)
+    assert all(result["gesture"] is None for result in results)
+    assert backend.actions == []
+
+
+def test_voice_commands_switch_the_mode(tmp_path, make_wav):
+    phrases = tmp_path / "phrases.txt"
+    phrases.write_text("mouse mode\n")
+    config = engine_config(voice={"enabled": True, "backend": "scripted", "model": str(phrases),
+                                  "source": make_wav(1.5, [(0.3, 0.8)])})
+    results, backend = run(SyntheticSource(320, 240, count=75, realtime=True), config)
+    assert results[0]["mode"] == "Whiteboard Mode"
+    assert results[-1]["mode"] == "Mouse Mode"
+    assert backend.actions == []
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from frame_sources import SyntheticSource, open_source, parse_synthetic_spec
+
+
+@pytest.mark.parametrize("spec, size", [("synthetic", (640, 480)), ("synthetic:320x240", (320, 240))])
+def test_synthetic_specs(spec, size):
+    assert parse_synthetic_spec(spec) == size
+    with open_source(spec, realtime=False) as source:
+        ok, frame = source.read()
+    assert ok and frame.shape == (size[1], size[0], 3)
+
+
+@pytest.mark.parametrize("spec", ["synthetic:abc", "synthetic:0x0", "syntheticfoo", "synthetic:1x2x3"])
+def test_malformed_synthetic_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_synthetic_spec(spec)
+
+
+def test_synthetic_frames_are_deterministic_and_finite():
+    first = [frame for frame in SyntheticSource(64, 48, count=5)]
+    second = [frame for frame in SyntheticSource(64, 48, count=5)]
+    assert len(first) == 5
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
@@ -0,0 +1,49 @@
+from gestures import GestureStateMachine, GestureVoter
+
+
+def feed(engine, labels, start=0.0, step=0.05):
+    """Feed one label per frame; returns [(kind, gesture)] events and the next timestamp."""
+    events = []
+    timestamp = start
+    for label in labels:
+        events += [(event.kind, event.gesture) for event in engine.update(label, timestamp)]
+        timestamp += step
+    return events, timestamp
+
+
+def test_voter_tracks_the_leader_over_its_window():
+    voter = GestureVoter(window=3)
+    for label in ("Fist", "Fist", "Open Hand", "Open Hand"):
+        voter.add(label)
+    assert voter.leader == "Open Hand"
+    assert voter.share("Fist") == 1 / 3
+
+
+def test_gesture_starts_only_after_its_enter_dwell():
+    engine = GestureStateMachine(window=4, enter_dwell=0.2, exit_dwell=0.2)
+    events, _ = feed(engine, ["Fist"] * 4)
+    assert events == [] and engine.active is None
+    events, _ = feed(engine, ["Fist"] * 4, start=0.2)
+    assert events == [("start", "Fist")]
+    assert engine.active == "Fist"
+
+
+def test_hysteresis_keeps_the_gesture_through_brief_dropouts():
+    engine = GestureStateMachine(window=5, enter_ratio=0.6, exit_ratio=0.4, enter_dwell=0.0, exit_dwell=0.0)
+    _, timestamp = feed(engine, ["Fist"] * 5)
+    # Two of five frames lost still leaves 60% of the votes, above exit_ratio
+    events, timestamp = feed(engine, [None, None], start=timestamp)
+    assert events == [] and engine.active == "Fist"
+    events, _ = feed(engine, [None, None], start=timestamp)
+    assert events == [("end", "Fist")]
+
+
+def test_per_gesture_dwell_overrides_the_default():
+    engine = GestureStateMachine(window=2, enter_dwell=0.0, exit_dwell=0.0, dwell={"Open Hand": (1.0, 0.0)})
+    events, timestamp = feed(engine, ["Pointing"] * 2)
+    assert events == [("start", "Pointing")]
+    engine.reset(timestamp)
+    events, _ = feed(engine, ["Open Hand"] * 10, start=timestamp, step=0.05)
+    assert events == []
+    events, _ = feed(engine, ["Open Hand"], start=timestamp + 1.0)
+    assert events == [("start", "Open Hand")]
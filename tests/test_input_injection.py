@@ -0,0 +1,36 @@
+import time
+
+from input_injection import InputInjector, RecordingBackend
+
+
+def recorded(backend):
+    return [(action.kind, action.args) for _, action in backend.actions]
+
+
+def test_actions_keep_their_order_and_moves_collapse():
+    backend = RecordingBackend(latency=0.05)
+    injector = InputInjector(backend)
+    # The worker can take at most the first move before the others queue up behind it
+    for x in range(1, 6):
+        injector.move(x, x)
+    injector.mouse_down()
+    injector.scroll(3)
+    injector.scroll(4)
+    injector.mouse_up()
+    injector.stop()
+    actions = recorded(backend)
+    assert actions[-4:] == [("move", (5, 5)), ("mouse_down", ()), ("scroll", (7,)), ("mouse_up", ())]
+    assert actions[:-4] in ([], [("move", (1, 1))])
+    assert injector.coalesced == 5 - len(actions[:-4])
+
+
+def test_submitting_never_waits_for_a_slow_backend():
+    backend = RecordingBackend(latency=0.1)
+    injector = InputInjector(backend)
+    started = time.perf_counter()
+    for _ in range(10):
+        injector.click()
+    assert time.perf_counter() - started < 0.05
+    assert injector.flush(timeout=5.0)
+    injector.stop()
+    assert len(backend.actions) == 10
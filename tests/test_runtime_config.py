@@ -0,0 +1,66 @@
+import pytest
+
+import visiosense
+from runtime_config import RuntimeConfig
+
+
+@pytest.fixture
+def config():
+    return RuntimeConfig(visiosense.DEFAULT_SETTINGS, validate=visiosense.validate_settings)
+
+
+def test_update_bumps_version_and_converts_types(config):
+    version = config.update({"cursor": {"smoothing": "0.8"}, "capture": {"fps": 15.0}})
+    assert version == config.version == 1
+    assert config.get("cursor", "smoothing") == 0.8
+    assert config.get("capture", "fps") == 15 and isinstance(config.get("capture", "fps"), int)
+
+
+def test_unchanged_values_keep_the_version(config):
+    config.update({"cursor": {"smoothing": visiosense.DEFAULT_SETTINGS["cursor"]["smoothing"]}})
+    assert config.version == 0
+
+
+def test_snapshot_is_a_copy(config):
+    _, values = config.snapshot()
+    values["gestures"]["dwell"]["Fist"] = (9, 9)
+    assert config.get("gestures", "dwell")["Fist"] != (9, 9)
+
+
+@pytest.mark.parametrize("changes", [
+    {"unknown": {"x": 1}},
+    {"cursor": {"unknown": 1}},
+])
+def test_unknown_settings_raise_key_error(config, changes):
+    with pytest.raises(KeyError):
+        config.update(changes)
+
+
+@pytest.mark.parametrize("changes", [
+    {"gestures": {"window": 0}},
+    {"gestures": {"exit_ratio": 0.9}},
+    {"gestures": {"sensitivity": 1.5}},
+    {"gestures": {"dwell": 5}},
+    {"gestures": {"dwell": {"Fist": [1]}}},
+    {"cursor": {"filter": "nope"}},
+    {"hands": {"min_detection_confidence": 2}},
+    {"capture": {"width": 0}},
+    {"face": {"every_n": 0}},
+    {"objects": {"conf": -1}},
+    {"status": {"max_rate": 0}},
+    {"voice": {"backend": "x"}},
+    {"input": {"pinch_threshold": "not a number"}},
+])
+def test_invalid_changes_are_rejected_without_applying_anything(config, changes):
+    before = config.snapshot()
+    with pytest.raises(ValueError):
+        config.update(dict(changes, cursor=dict(changes.get("cursor", {}), smoothing=0.9)))
+    assert config.snapshot() == before
+
+
+def test_restore_replaces_values_with_a_new_version(config):
+    _, previous = config.snapshot()
+    config.update({"gestures": {"window": 12}})
+    version = config.restore(previous)
+    assert version == 2
+    assert config.get("gestures", "window") == previous["gestures"]["window"]
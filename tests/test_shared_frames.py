@@ -0,0 +1,67 @@
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+from shared_frames import SharedFrameRing
+
+
+def _read_in_child(spec, results):
+    ring = SharedFrameRing.attach(**spec)
+    seq = ring.wait(0, timeout=10.0)
+    timestamp, view = ring.read(seq)
+    results.put((seq, timestamp, int(view.sum()), view.shape))
+    view = None
+    ring.close()
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing.create(64 * 48 * 3, slots=3)
+    yield ring
+    ring.close()
+
+
+def test_write_and_read_round_trip(ring):
+    frame = np.arange(48 * 64 * 3, dtype=np.uint8).reshape(48, 64, 3)
+    seq = ring.write(frame, timestamp=12.5)
+    timestamp, view = ring.read(seq)
+    assert seq == ring.last_seq == 1
+    assert timestamp == 12.5
+    np.testing.assert_array_equal(view, frame)
+    assert ring.valid(seq)
+
+
+def test_lapped_frames_are_no_longer_valid(ring):
+    frame = np.zeros((48, 64, 3), np.uint8)
+    for _ in range(4):
+        ring.write(frame)
+    assert ring.read(1) is None and not ring.valid(1)
+    assert ring.valid(4)
+
+
+def test_oversized_frames_are_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.write(np.zeros((480, 640, 3), np.uint8))
+
+
+def test_wait_times_out_without_new_frames(ring):
+    started = time.monotonic()
+    assert ring.wait(0, timeout=0.1) is None
+    assert time.monotonic() - started >= 0.1
+
+
+def test_reader_in_another_process_is_woken_by_the_writer():
+    context = multiprocessing.get_context("spawn")
+    ring = SharedFrameRing.create(64 * 48 * 3, slots=3, context=context)
+    results = context.Queue()
+    process = context.Process(target=_read_in_child, args=(ring.spec(), results))
+    process.start()
+    try:
+        time.sleep(0.5)
+        ring.write(np.full((48, 64, 3), 2, np.uint8), timestamp=1.0)
+        assert results.get(timeout=30) == (1, 1.0, 2 * 48 * 64 * 3, (48, 64, 3))
+    finally:
+        process.join(10)
+        ring.close()
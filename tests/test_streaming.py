@@ -0,0 +1,50 @@
+import threading
+import time
+
+import numpy as np
+
+from frame_bus import FrameBus
+from streaming import MJPEGBroadcaster
+
+
+def publish_for(bus, seconds, fps=30):
+    published = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        bus.publish("annotated", np.random.randint(0, 255, (48, 64, 3), np.uint8))
+        published += 1
+        time.sleep(1 / fps)
+    return published
+
+
+def run_clients(clients, seconds=1.0):
+    """Stream to `clients` (stream() kwargs) while publishing; returns (published, encoded, parts per client)."""
+    bus = FrameBus()
+    broadcaster = MJPEGBroadcaster(bus)
+    counts = [0] * len(clients)
+
+    def consume(index, stream):
+        for _ in stream:
+            counts[index] += 1
+
+    threads = [threading.Thread(target=consume, args=(i, broadcaster.stream(**kwargs)))
+               for i, kwargs in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    published = publish_for(bus, seconds)
+    broadcaster.stop()
+    for thread in threads:
+        thread.join(timeout=5.0)
+    return published, broadcaster.frames_encoded, counts
+
+
+def test_clients_of_one_variant_share_each_encoded_frame():
+    published, encoded, counts = run_clients([{}, {}, {}])
+    assert encoded <= published
+    assert min(counts) > published / 2
+
+
+def test_throttled_clients_only_encode_frames_they_send():
+    published, encoded, counts = run_clients([{"quality": 50, "max_fps": 4}])
+    assert encoded == counts[0] <= 6 < published
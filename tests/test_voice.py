@@ -0,0 +1,45 @@
+import queue
+
+from voice import CommandMatcher, EnergyVAD, ScriptedRecognizer, VoicePipeline, WavFileSource
+
+
+def drain(commands):
+    items = []
+    while True:
+        try:
+            items.append(commands.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def test_command_matcher():
+    matcher = CommandMatcher()
+    assert matcher.match("please switch to MOUSE  mode").arg == "mouse"
+    assert matcher.match("clear the canvas").name == "clear"
+    assert matcher.match("hello there") is None
+
+
+def test_vad_ignores_silence_and_short_clicks(make_wav):
+    source = WavFileSource(make_wav(1.5, [(0.5, 0.55)]))
+    source.open()
+    vad = EnergyVAD(source.sample_rate)
+    segments = []
+    while True:
+        chunk = source.read()
+        if not chunk:
+            break
+        segments.append(vad.process(chunk))
+    source.close()
+    assert [segment for segment in segments if segment] == []
+    assert vad.flush() is None
+
+
+def test_pipeline_turns_speech_segments_into_commands(make_wav):
+    path = make_wav(3.0, [(0.3, 0.8), (1.3, 1.7), (2.2, 2.6)])
+    recognizer = ScriptedRecognizer(["undo", "nothing to see", "mouse mode"])
+    commands = queue.Queue()
+    pipeline = VoicePipeline(WavFileSource(path), recognizer, commands).start()
+    pipeline.join(timeout=10.0)
+    assert not pipeline.running
+    assert len(recognizer.segments) == 3
+    assert [(command.name, command.arg) for command in drain(commands)] == [("undo", None), ("mode", "mouse")]
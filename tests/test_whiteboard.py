@@ -0,0 +1,57 @@
+import numpy as np
+
+from whiteboard import StrokeStore, Whiteboard
+
+
+def draw(store, *strokes):
+    for points in strokes:
+        store.begin((0, 0, 255), 0.01)
+        for x, y in points:
+            store.add_point(x, y)
+        store.end()
+
+
+def test_undo_redo_and_clear():
+    store = StrokeStore()
+    draw(store, [(0.1, 0.1), (0.2, 0.2)], [(0.5, 0.5)])
+    assert len(store) == 2
+    assert store.undo() and len(store) == 1 and store.can_redo
+    assert store.redo() and len(store) == 2
+    assert not store.redo()
+    store.clear()
+    assert len(store) == 0 and not store.can_undo
+    assert store.redo() and len(store) == 1
+
+
+def test_new_stroke_discards_redo_history():
+    store = StrokeStore()
+    draw(store, [(0.1, 0.1)], [(0.2, 0.2)])
+    store.undo()
+    draw(store, [(0.9, 0.9), (0.8, 0.8)])
+    assert not store.can_redo
+    points, _, stroke_ids = store.points
+    np.testing.assert_allclose(points, [(0.1, 0.1), (0.9, 0.9), (0.8, 0.8)])
+    assert stroke_ids.tolist() == [0, 1, 1]
+
+
+def test_empty_strokes_are_dropped_and_storage_grows():
+    store = StrokeStore(capacity=2)
+    store.begin((0, 0, 0), 0.01)
+    store.end()
+    assert len(store) == 0
+    draw(store, [(i / 10, i / 10) for i in range(10)])
+    assert len(store.points[0]) == 10
+
+
+def test_whiteboard_render_keeps_the_drawing_aspect():
+    board = Whiteboard()
+    board.composite(np.zeros((480, 640, 3), np.uint8))
+    board.draw_to(0.0, 0.5)
+    board.draw_to(1.0, 0.5)
+    board.lift()
+    image = board.render(1920, 1080, background=(0, 0, 0))
+    columns = np.flatnonzero(image.any(axis=(0, 2)))
+    # A 4:3 drawing is letterboxed into 16:9, not stretched across it
+    assert columns.min() >= 230 and columns.max() <= 1690
+    board.undo()
+    assert not board.render(320, 240, background=(0, 0, 0)).any()
@@ -23,105 +23,266 @@ Works on Windows webcam in real time.
 """
 
 import cv2
-import mediapipe as mp
+import enum
+import functools
+import importlib
 import math
 import collections
 import time
 import numpy as np
-import pyautogui
+import queue
 import sys
 import os
-import threading
 import webbrowser
-from scipy.spatial import distance as dist
-from ultralytics import YOLO
+import argparse
+import metrics
+from models import ModelRegistry
+from frame_sources import FrameSource, open_source
+from gestures import GestureStateMachine
+from whiteboard import Whiteboard
+from cursor_filters import create_filter, FILTERS as CURSOR_FILTERS
+from runtime_config import RuntimeConfig
+from inference import (StagedInferenceExecutor, AsyncObjectDetector, ProcessObjectDetector,
+                       FaceAnalysisScheduler, HandROITracker, DETECTION_DTYPE, empty_detections)
 
-# Try to import speech recognition, if not available, disable voice features
-try:
-    import speech_recognition as sr
-    SPEECH_AVAILABLE = True
-except ImportError:
-    print("⚠️  SpeechRecognition module not found. Voice commands will be disabled.")
-    SPEECH_AVAILABLE = False
-    sr = None
+# Voice commands: speech-gated recognition whose commands the frame loop executes
+from voice import create_voice_pipeline, RECOGNIZERS as VOICE_RECOGNIZERS
 
-# Disable pyautogui failsafe for better gesture control
-pyautogui.FAILSAFE = False
+# Mouse actions go through a background worker (pyautogui, null or recording backend)
+from input_injection import InputInjector, BACKENDS as INPUT_BACKENDS
 
 # ===== SETUP =====
-mp_drawing = mp.solutions.drawing_utils
-mp_hands = mp.solutions.hands
-mp_face_mesh = mp.solutions.face_mesh
-
-# Load YOLOv8 model globally
-try:
-    print("Loading YOLOv8 model...")
-    yolo_model = YOLO('yolov8n.pt')
-    print("✓ YOLOv8 model loaded!")
-    OBJECT_DETECTION_AVAILABLE = True
-except Exception as e:
-    print(f"⚠️  YOLOv8 model not available: {e}")
-    yolo_model = None
-    OBJECT_DETECTION_AVAILABLE = False
+# Heavy libraries and models are loaded lazily (on first use or by a
+# background warm-up) so importing this module stays fast.
+def _load_yolo():
+    from ultralytics import YOLO
+    return YOLO('yolov8n.pt')
+
+models = ModelRegistry()
+models.register("mediapipe", lambda: importlib.import_module("mediapipe"), "MediaPipe")
+models.register("yolo", _load_yolo, "YOLOv8 model")
+
+class HandLandmark(enum.IntEnum):
+    """MediaPipe hand landmark indices (mirrors mp.solutions.hands.HandLandmark)."""
+    WRIST = 0
+    THUMB_CMC = 1
+    THUMB_MCP = 2
+    THUMB_IP = 3
+    THUMB_TIP = 4
+    INDEX_FINGER_MCP = 5
+    INDEX_FINGER_PIP = 6
+    INDEX_FINGER_DIP = 7
+    INDEX_FINGER_TIP = 8
+    MIDDLE_FINGER_MCP = 9
+    MIDDLE_FINGER_PIP = 10
+    MIDDLE_FINGER_DIP = 11
+    MIDDLE_FINGER_TIP = 12
+    RING_FINGER_MCP = 13
+    RING_FINGER_PIP = 14
+    RING_FINGER_DIP = 15
+    RING_FINGER_TIP = 16
+    PINKY_MCP = 17
+    PINKY_PIP = 18
+    PINKY_DIP = 19
+    PINKY_TIP = 20
+
+# ===== STAGE SETTINGS =====
+# Object detection can run asynchronously: a background worker runs YOLO on
+# the latest frame at most every `interval` seconds, and boxes are tracked
+# with optical flow in between. Results older than `max_age` are dropped.
+# With `processes` > 0, YOLO runs in that many worker processes instead,
+# reading frames from shared memory (one copy, no pickling); the web server
+# defaults to one worker process.
+# Face analysis (head angle, expression) runs FaceMesh every `every_n`
+# frames or at `target_hz`, optionally on a crop around the last face.
+# Hand tracking feeds MediaPipe a padded crop around the previous hands
+# (upscaled to at least `min_size` px) and searches the full frame when
+# tracking is lost or every `full_frame_every` frames.
+STAGE_SETTINGS = {
+    "hands": {"roi": True, "padding": 0.6, "min_size": 256, "full_frame_every": 30},
+    "objects": {"async": True, "processes": 0, "interval": 0.0, "max_age": 0.5},
+    "face": {"every_n": 2, "target_hz": None, "crop": True, "interpolate": True},
+}
+
+# Gesture voting over the last `window` frames. A gesture starts after
+# holding `enter_ratio` of the votes for its enter dwell and ends after
+# falling below `exit_ratio` for its exit dwell. Mode-switching and
+# canvas-clearing gestures get longer dwells so a passing hand shape
+# can't trigger them.
+GESTURE_SETTINGS = {
+    "window": 8,
+    "enter_ratio": 0.6,
+    "exit_ratio": 0.4,
+    "enter_dwell": 0.1,
+    "exit_dwell": 0.15,
+    "dwell": {"Fist": (0.25, 0.3), "Open Hand": (0.4, 0.2)},
+}
+
+# Cursor smoothing in mouse mode: "ema" (the original fixed factor),
+# "one_euro" or "predictive" (One Euro + latency-compensating prediction).
+# `smoothing` (0-1) follows the dashboard's Cursor Smoothing slider and is
+# picked up by the running engine on the next frame.
+CURSOR_SETTINGS = {"filter": "predictive", "smoothing": 0.4}
+
+# Everything that can be tuned while the engine runs, with the settings
+# above as defaults. The frame loop applies changes to `settings` (e.g. from
+# the web UI's /update-settings) at the next frame boundary. `capture`
+# applies to the camera main() opens itself or to a CameraPublisher given
+# the same config; gesture `sensitivity` scales the dwell times (0.7 keeps
+# them as configured, higher reacts faster). `status` throttles the live
+# status events sent to dashboard clients. `voice` selects the recognizer
+# ("auto", "vosk", "sphinx", "google" or "scripted"), its `model` (Vosk
+# model directory, or phrase file for "scripted"), a WAV file `source`
+# instead of the microphone, and the speech gate's energy thresholds.
+DEFAULT_SETTINGS = {
+    "capture": {"width": 640, "height": 480, "fps": 30},
+    "hands": dict(STAGE_SETTINGS["hands"], min_detection_confidence=0.7, min_tracking_confidence=0.7),
+    "face": dict(STAGE_SETTINGS["face"], min_detection_confidence=0.7, min_tracking_confidence=0.7),
+    "objects": dict(STAGE_SETTINGS["objects"], conf=0.5, imgsz=640),
+    "gestures": dict(GESTURE_SETTINGS, sensitivity=0.7),
+    "cursor": dict(CURSOR_SETTINGS),
+    "input": {"pinch_threshold": 0.04, "min_click_interval": 0.3, "drag_hold": 0.6, "scroll_threshold": 50.0},
+    "drawing": {"enabled": True},
+    "status": {"max_rate": 10.0, "keepalive": 5.0},
+    "voice": {"enabled": True, "backend": "auto", "model": "", "source": "",
+              "energy_ratio": 3.0, "min_energy": 300.0, "hangover": 0.4},
+}
+
+# Allowed (min, max) of numeric settings (max None: unbounded) and allowed choices
+SETTING_RANGES = {
+    "capture": {"width": (16, 7680), "height": (16, 4320), "fps": (1, 240)},
+    "hands": {"padding": (0.0, None), "min_size": (1, None), "full_frame_every": (1, None),
+              "min_detection_confidence": (0.0, 1.0), "min_tracking_confidence": (0.0, 1.0)},
+    "face": {"every_n": (1, None), "target_hz": (0.01, None),
+             "min_detection_confidence": (0.0, 1.0), "min_tracking_confidence": (0.0, 1.0)},
+    "objects": {"processes": (0, os.cpu_count() or 1), "interval": (0.0, None), "max_age": (0.0, None),
+                "conf": (0.0, 1.0), "imgsz": (32, 4096)},
+    "gestures": {"window": (1, 300), "enter_ratio": (0.0, 1.0), "exit_ratio": (0.0, 1.0),
+                 "enter_dwell": (0.0, None), "exit_dwell": (0.0, None), "sensitivity": (0.0, 1.0)},
+    "cursor": {"smoothing": (0.0, 1.0)},
+    "input": {"pinch_threshold": (0.0, 1.0), "min_click_interval": (0.0, None), "drag_hold": (0.0, None),
+              "scroll_threshold": (0.0, None)},
+    "status": {"max_rate": (0.1, 100.0), "keepalive": (0.1, None)},
+    "voice": {"energy_ratio": (1.0, None), "min_energy": (0.0, None), "hangover": (0.0, 10.0)},
+}
+SETTING_CHOICES = {
+    ("cursor", "filter"): tuple(CURSOR_FILTERS),
+    ("voice", "backend"): ("auto",) + tuple(VOICE_RECOGNIZERS),
+}
+
+def validate_settings(values):
+    """Reject settings the engine can't run with (RuntimeConfig `validate` hook)."""
+    for section, ranges in SETTING_RANGES.items():
+        for key, (low, high) in ranges.items():
+            value = values[section][key]
+            if value is None:
+                continue
+            if value < low or (high is not None and value > high):
+                allowed = f"between {low} and {high}" if high is not None else f"at least {low}"
+                raise ValueError(f"{section}.{key} must be {allowed}, got {value}")
+    for (section, key), choices in SETTING_CHOICES.items():
+        if values[section][key] not in choices:
+            raise ValueError(f"{section}.{key} must be one of {', '.join(choices)}, got {values[section][key]!r}")
+    for gesture, times in values["gestures"]["dwell"].items():
+        if (not isinstance(times, (list, tuple)) or len(times) != 2
+                or not all(isinstance(t, (int, float)) and t >= 0 for t in times)):
+            raise ValueError(f"gestures.dwell.{gesture} must be [enter_seconds, exit_seconds], got {times!r}")
+    # Build the objects the frame loop would build, so their own checks run here too
+    GestureStateMachine(**gesture_params(values["gestures"]))
+    create_filter(values["cursor"]["filter"], values["cursor"]["smoothing"])
+
+settings = RuntimeConfig(DEFAULT_SETTINGS, validate=validate_settings)
+
+MP_CONFIDENCE_KEYS = ("min_detection_confidence", "min_tracking_confidence")
 
 # ===== UTILITY FUNCTIONS =====
+# Hand landmarks are handled as float32 arrays of shape (hands, 21, 3)
+# (x, y, z per landmark) so finger states and distances can be computed
+# for many hands (or many recorded frames) in one vectorized call.
+FINGER_TIPS = np.array([HandLandmark.INDEX_FINGER_TIP, HandLandmark.MIDDLE_FINGER_TIP,
+                        HandLandmark.RING_FINGER_TIP, HandLandmark.PINKY_TIP])
+FINGER_PIPS = np.array([HandLandmark.INDEX_FINGER_PIP, HandLandmark.MIDDLE_FINGER_PIP,
+                        HandLandmark.RING_FINGER_PIP, HandLandmark.PINKY_PIP])
+
+# Gesture names indexed by classify_hands(); "N Fingers" fallbacks follow
+GESTURE_LABELS = np.array(["Fist", "Pinch", "Index Pointing", "Two-Finger Scroll", "Peace", "Open Hand"]
+                          + [f"{n} Fingers" for n in range(6)])
+
+Landmark = collections.namedtuple('Landmark', ['x', 'y', 'z'])
+
+def landmarks_to_array(multi_hand_landmarks):
+    """Convert MediaPipe hand landmarks to a (hands, 21, 3) float32 array."""
+    return np.array([[(lm.x, lm.y, lm.z) for lm in hand.landmark]
+                     for hand in multi_hand_landmarks], dtype=np.float32).reshape(-1, 21, 3)
+
+def _as_hand_array(hand):
+    """Accept a (21, 3) array or a MediaPipe NormalizedLandmarkList."""
+    if isinstance(hand, np.ndarray):
+        return hand
+    return landmarks_to_array([hand])[0]
+
 def dist(a, b):
-    """Calculate Euclidean distance between two points."""
+    """Calculate Euclidean distance between two points (or arrays of points)."""
+    if isinstance(a, np.ndarray):
+        return np.hypot(a[..., 0] - b[..., 0], a[..., 1] - b[..., 1])
     return math.hypot(a.x - b.x, a.y - b.y)
 
-def count_fingers(hand_landmarks, handedness_label):
-    """Count extended fingers and return both count and finger states."""
-    lm = hand_landmarks.landmark
-    fingers = []
-    
-    # Thumb (account for handedness)
-    if handedness_label == "Right":
-        fingers.append(1 if lm[mp_hands.HandLandmark.THUMB_TIP].x < lm[mp_hands.HandLandmark.THUMB_IP].x else 0)
-    else:
-        fingers.append(1 if lm[mp_hands.HandLandmark.THUMB_TIP].x > lm[mp_hands.HandLandmark.THUMB_IP].x else 0)
+def finger_states(hands, is_right):
+    """Finger extension bits (hands, 5) for a (hands, 21, 3) array.
     
-    # Other fingers (index, middle, ring, pinky)
-    tips = [mp_hands.HandLandmark.INDEX_FINGER_TIP,
-            mp_hands.HandLandmark.MIDDLE_FINGER_TIP,
-            mp_hands.HandLandmark.RING_FINGER_TIP,
-            mp_hands.HandLandmark.PINKY_TIP]
-    pips = [mp_hands.HandLandmark.INDEX_FINGER_PIP,
-            mp_hands.HandLandmark.MIDDLE_FINGER_PIP,
-            mp_hands.HandLandmark.RING_FINGER_PIP,
-            mp_hands.HandLandmark.PINKY_PIP]
+    `is_right` is a boolean array with one entry per hand (handedness label
+    "Right"); the thumb test is mirrored for left hands.
+    """
+    thumb_tip_x = hands[:, HandLandmark.THUMB_TIP, 0]
+    thumb_ip_x = hands[:, HandLandmark.THUMB_IP, 0]
+    thumb = np.where(is_right, thumb_tip_x < thumb_ip_x, thumb_tip_x > thumb_ip_x)
+    others = hands[:, FINGER_TIPS, 1] < hands[:, FINGER_PIPS, 1]
+    return np.concatenate([thumb[:, None], others], axis=1).astype(np.int8)
+
+def gestures_from_states(bits, hands):
+    """Gesture names for finger bits (hands, 5) and a (hands, 21, 3) array."""
+    total = bits.sum(axis=1)
+    d_thumb_index = dist(hands[:, HandLandmark.THUMB_TIP], hands[:, HandLandmark.INDEX_FINGER_TIP])
+    d_idx_mid = dist(hands[:, HandLandmark.INDEX_FINGER_TIP], hands[:, HandLandmark.MIDDLE_FINGER_TIP])
+    two_fingers = (total == 2) & (bits[:, 1] == 1) & (bits[:, 2] == 1)
     
-    for tip, pip in zip(tips, pips):
-        fingers.append(1 if lm[tip].y < lm[pip].y else 0)
+    # Same precedence as the if/elif chain in detect_gesture()
+    index = np.select(
+        [total == 0,
+         (d_thumb_index < 0.04) & (bits[:, 2:].sum(axis=1) == 0),
+         (total == 1) & (bits[:, 1] == 1),
+         two_fingers & (d_idx_mid < 0.08),
+         two_fingers,
+         total == 5],
+        [0, 1, 2, 3, 4, 5],
+        default=6 + total
+    )
+    return GESTURE_LABELS[index]
+
+def classify_hands(hands, is_right):
+    """Vectorized finger counting and gesture detection.
     
-    return sum(fingers), fingers
+    Returns (counts, bits, gestures) for a (hands, 21, 3) array, where
+    `gestures` is an array of gesture names from GESTURE_LABELS.
+    """
+    bits = finger_states(hands, is_right)
+    return bits.sum(axis=1), bits, gestures_from_states(bits, hands)
+
+def count_fingers(hand_landmarks, handedness_label):
+    """Count extended fingers and return both count and finger states."""
+    hand = _as_hand_array(hand_landmarks)
+    bits = finger_states(hand[None], np.array([handedness_label == "Right"]))[0]
+    return int(bits.sum()), bits.tolist()
 
 def detect_gesture(bits, landmarks):
     """Detect specific gestures based on finger states and landmark positions."""
-    total = sum(bits)
-    d_thumb_index = dist(landmarks.landmark[mp_hands.HandLandmark.THUMB_TIP],
-                        landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP])
-    
-    # Gesture detection logic
-    if total == 0:
-        return "Fist"
-    elif d_thumb_index < 0.04 and sum(bits[2:]) == 0:
-        return "Pinch"
-    elif total == 1 and bits[1] == 1:
-        return "Index Pointing"
-    elif total == 2 and bits[1] == 1 and bits[2] == 1:
-        d_idx_mid = dist(landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP],
-                        landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP])
-        if d_idx_mid < 0.08:
-            return "Two-Finger Scroll"
-        return "Peace"
-    elif total == 5:
-        return "Open Hand"
-    else:
-        return f"{total} Fingers"
+    hand = _as_hand_array(landmarks)
+    return str(gestures_from_states(np.asarray([bits]), hand[None])[0])
 
 def detect_namaskar(hand1, hand2):
     """Detect Namaskar gesture when two hands are close together."""
-    wrist_distance = dist(hand1.landmark[0], hand2.landmark[0])
+    wrist_distance = dist(_as_hand_array(hand1)[HandLandmark.WRIST],
+                          _as_hand_array(hand2)[HandLandmark.WRIST])
     return wrist_distance < 0.15
 
 def majority(sequence):
@@ -159,97 +320,126 @@ def detect_facial_expression(landmarks):
     else:
         return "Normal"
 
-def process_object_detection(frame):
-    """Run YOLOv8 object detection and draw results on frame."""
-    detected_objects = []
-    
-    if not OBJECT_DETECTION_AVAILABLE or yolo_model is None:
-        return frame, detected_objects
+def gesture_params(gesture_settings):
+    """GestureStateMachine arguments for a "gestures" settings section."""
+    params = {key: value for key, value in gesture_settings.items() if key != "sensitivity"}
+    scale = max(0.0, 1.0 - gesture_settings["sensitivity"]) / (1.0 - DEFAULT_SETTINGS["gestures"]["sensitivity"])
+    params["enter_dwell"] *= scale
+    params["exit_dwell"] *= scale
+    params["dwell"] = {gesture: (enter * scale, exit * scale)
+                       for gesture, (enter, exit) in params["dwell"].items()}
+    return params
+
+def detect_objects(frame, conf=0.5, imgsz=640):
+    """Run YOLOv8 object detection and return a DETECTION_DTYPE array."""
+    # Never block the frame loop on model loading
+    yolo_model = models.get("yolo", wait=False)
+    if yolo_model is None:
+        return empty_detections()
     
     try:
         # Run YOLO inference
-        results = yolo_model(frame, conf=0.5)
+        with metrics.INFERENCE_SECONDS.labels(model="yolo").time():
+            results = yolo_model(frame, conf=conf, imgsz=imgsz)
         
-        # Draw detections on frame
+        # Convert each result's tensors to NumPy once instead of per box
+        chunks = []
         for result in results:
             boxes = result.boxes
-            
-            for box in boxes:
-                x1, y1, x2, y2 = box.xyxy[0]
-                x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-                
-                confidence = box.conf[0]
-                class_id = int(box.cls[0])
-                class_name = result.names[class_id]
-                
-                # Store detected object
-                detected_objects.append({
-                    'name': class_name,
-                    'confidence': float(confidence)
-                })
-                
-                # Draw bounding box (cyan color)
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 255, 0), 2)
-                
-                # Prepare label
-                label = f"{class_name}: {confidence:.2f}"
-                label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                label_y = y1 - 10 if y1 - 10 > 20 else y1 + 25
-                
-                # Draw label background
-                cv2.rectangle(frame, (x1, label_y - label_size[1] - 4), 
-                             (x1 + label_size[0] + 4, label_y + 4), (255, 255, 0), -1)
-                
-                # Draw label text
-                cv2.putText(frame, label, (x1, label_y), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+            chunk = np.empty(len(boxes), dtype=DETECTION_DTYPE)
+            chunk['box'] = boxes.xyxy.cpu().numpy()
+            chunk['score'] = boxes.conf.cpu().numpy()
+            chunk['class_id'] = boxes.cls.cpu().numpy()
+            chunks.append(chunk)
+        if chunks:
+            return np.concatenate(chunks)
     except Exception as e:
         print(f"Error in object detection: {e}")
     
-    return frame, detected_objects
+    return empty_detections()
 
-def voice_command_handler():
-    """Handle voice commands in a separate thread."""
-    if not SPEECH_AVAILABLE:
-        return
+def object_class_name(class_id):
+    """Return the YOLO class name for a class id."""
+    yolo_model = models.get("yolo", wait=False)
+    if yolo_model is None:
+        return str(class_id)
+    return yolo_model.names.get(class_id, str(class_id))
+
+def detections_to_dicts(detections):
+    """Convert a DETECTION_DTYPE array to JSON-friendly dicts for the API."""
+    return [
+        {'name': object_class_name(class_id), 'confidence': score, 'box': box}
+        for box, score, class_id in zip(detections['box'].round(1).tolist(),
+                                        detections['score'].tolist(),
+                                        detections['class_id'].tolist())
+    ]
+
+@functools.lru_cache(maxsize=256)
+def _label_size(class_name):
+    """Text size of an object label (digits share a width, so cache per class)."""
+    label_size, _ = cv2.getTextSize(f"{class_name}: 0.00", cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+    return label_size
+
+def draw_object_detections(frame, detections):
+    """Draw object bounding boxes and labels on frame."""
+    if len(detections) == 0:
+        return frame
     
-    try:
-        recognizer = sr.Recognizer()
-        microphone = sr.Microphone()
+    # Convert coordinates once for all boxes
+    boxes = detections['box'].astype(np.int32)
+    label_ys = np.where(boxes[:, 1] - 10 > 20, boxes[:, 1] - 10, boxes[:, 1] + 25)
+    
+    for (x1, y1, x2, y2), label_y, score, class_id in zip(boxes.tolist(), label_ys.tolist(),
+                                                          detections['score'].tolist(),
+                                                          detections['class_id'].tolist()):
+        class_name = object_class_name(class_id)
         
-        with microphone as source:
-            recognizer.adjust_for_ambient_noise(source)
+        # Draw bounding box (cyan color)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 255, 0), 2)
         
-        while True:
-            try:
-                with microphone as source:
-                    audio = recognizer.listen(source, timeout=1, phrase_time_limit=3)
-                
-                try:
-                    command = recognizer.recognize_google(audio).lower()
-                    print(f"Voice command: {command}")
-                    
-                    if "open youtube" in command:
-                        webbrowser.open("https://youtube.com")
-                    elif "open google" in command:
-                        webbrowser.open("https://google.com")
-                    elif "open whatsapp" in command:
-                        webbrowser.open("https://web.whatsapp.com")
-                        
-                except sr.UnknownValueError:
-                    pass
-                except sr.RequestError:
-                    pass
-                    
-            except sr.WaitTimeoutError:
-                pass
-                
-    except Exception as e:
-        print(f"Voice recognition error: {e}")
+        # Prepare label
+        label = f"{class_name}: {score:.2f}"
+        label_size = _label_size(class_name)
+        
+        # Draw label background
+        cv2.rectangle(frame, (x1, label_y - label_size[1] - 4), 
+                     (x1 + label_size[0] + 4, label_y + 4), (255, 255, 0), -1)
+        
+        # Draw label text
+        cv2.putText(frame, label, (x1, label_y), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+    
+    return frame
 
-def check_camera():
+def analyze_face(landmarks):
+    """Compute head angle and facial expression from face landmarks."""
+    return {
+        'head_angle': calculate_face_angle(landmarks),
+        'expression': detect_facial_expression(landmarks),
+    }
+
+def process_object_detection(frame):
+    """Run YOLOv8 object detection and draw results on frame."""
+    detected_objects = detect_objects(frame)
+    return draw_object_detections(frame, detected_objects), detected_objects
+
+def save_whiteboard(whiteboard, w, h):
+    """Save the whiteboard as timestamped PNG and SVG files."""
+    name = time.strftime("whiteboard_%Y%m%d_%H%M%S")
+    whiteboard.save_png(name + ".png", w, h)
+    with open(name + ".svg", "w") as f:
+        f.write(whiteboard.to_svg(w, h))
+    print(f"💾 Whiteboard saved to {name}.png and {name}.svg")
+
+def apply_capture_settings(cap, capture_settings):
+    """Apply a "capture" settings section to a cv2.VideoCapture."""
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, capture_settings["width"])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, capture_settings["height"])
+    cap.set(cv2.CAP_PROP_FPS, capture_settings["fps"])
+
+def check_camera(device=0):
     """Check if camera is available and working."""
-    cap = cv2.VideoCapture(0)
+    cap = cv2.VideoCapture(device)
     if not cap.isOpened():
         return False, None
     
@@ -262,20 +452,51 @@ def check_camera():
     return True, frame.shape
 
 # ===== MAIN APPLICATION =====
-def main(web_mode=False):
-    """Main application function."""
+def main(web_mode=False, frame_bus=None, headless=False, draw_overlays=True,
+         on_result=None, result_queue=None, stop_event=None, source=None, whiteboard=None,
+         input_backend=None, config=None):
+    """Main application function.
+    
+    With `frame_bus`, frames are read from its "raw" topic instead of opening
+    the camera, and annotated frames are published on its "annotated" topic.
+    `source` replaces the webcam with a FrameSource (or an `open_source()`
+    spec such as a video file, image folder or "synthetic").
+    
+    With `headless`, no HighGUI window is created; `draw_overlays=False`
+    additionally skips all drawing. Per-frame results are then only available
+    through the `on_result` callback and/or `result_queue`, and the loop runs
+    until `stop_event` is set, the frames run out or Namaskar is detected.
+    
+    Strokes are drawn into `whiteboard` (a new Whiteboard by default), so a
+    caller can keep the drawing across runs, undo it or export it.
+    
+    Mouse actions are queued to a background InputInjector using
+    `input_backend` ("pyautogui", "null", "recording" or a backend object);
+    by default pyautogui when available.
+    
+    Thresholds, model confidences and performance knobs come from `config`
+    (the module-level `settings` by default) and may change while running.
+    """
     if not web_mode:
         print("VisioSense - Hand Gesture Control System")
         print("========================================")
     
-    # Check camera availability
-    camera_available, frame_shape = check_camera()
-    if not camera_available:
-        print("❌ Error: Camera not found or not accessible!")
-        input("Press Enter to exit...")
-        return
+    # Start loading models in the background while the camera is checked
+    models.warm_up()
+    
+    config = config or settings
+    config_version, cfg = config.snapshot()
+    
+    # Check camera availability (the frame bus already owns the camera)
+    if frame_bus is None and source is None:
+        camera_available, frame_shape = check_camera()
+        if not camera_available:
+            print("❌ Error: Camera not found or not accessible!")
+            if not headless:
+                input("Press Enter to exit...")
+            return
+        print("✅ Camera detected successfully!")
     
-    print("✅ Camera detected successfully!")
     print("\nGesture Controls:")
     print("- Fist → Mouse Mode (cursor control)")
     print("- Open Hand → Whiteboard Mode (drawing)")
@@ -283,29 +504,49 @@ def main(web_mode=False):
     print("- Index + Middle Finger → Scroll and Click")
     print("- Pinch → Click (hold for drag)")
     print("- Namaskar (both hands close) → Exit")
+    print("- Press 'u' / 'r' to undo / redo a stroke, 's' to save the whiteboard")
     print("- Press 'q' or ESC to exit")
     print("\nStarting VisioSense...")
     
-    # Initialize camera
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("❌ Failed to open camera!")
-        return
+    # Initialize camera, or subscribe to the shared capture / frame source
+    if frame_bus is not None:
+        cap = frame_bus.subscribe("raw", policy="latest")
+    elif source is not None:
+        cap = source if isinstance(source, FrameSource) else open_source(source)
+        if not cap.isOpened():
+            print(f"❌ Failed to open frame source: {source}")
+            return
+    else:
+        cap = cv2.VideoCapture(0)
+        if not cap.isOpened():
+            print("❌ Failed to open camera!")
+            return
+        
+        # Set camera properties
+        apply_capture_settings(cap, cfg["capture"])
+    own_camera = frame_bus is None and source is None
     
-    # Set camera properties
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_FPS, 30)
+    # MediaPipe is required for the gesture pipeline
+    mp = models.get("mediapipe")
+    if mp is None:
+        print("❌ MediaPipe is not available!")
+        cap.release()
+        return
+    mp_drawing = mp.solutions.drawing_utils
+    mp_hands = mp.solutions.hands
+    mp_face_mesh = mp.solutions.face_mesh
     
-    # Screen size for pyautogui mapping
-    screen_w, screen_h = pyautogui.size()
+    # Mouse actions run on their own thread so OS input calls never stall the frame loop
+    injector = InputInjector(input_backend)
+    screen_w, screen_h = injector.size()
     
     # State variables
-    canvas = None
-    GESTURE_HISTORY = collections.deque(maxlen=8)
+    if whiteboard is None:
+        whiteboard = Whiteboard()
+    gesture_engine = GestureStateMachine(**gesture_params(cfg["gestures"]))
     
     # Mouse control variables
-    prev_mouse_x, prev_mouse_y = screen_w // 2, screen_h // 2
+    cursor_filter = create_filter(cfg["cursor"]["filter"], cfg["cursor"]["smoothing"])
     mouse_mode = False
     whiteboard_mode = False
     
@@ -314,8 +555,8 @@ def main(web_mode=False):
     pinch_start = 0.0
     drag_active = False
     last_click_time = 0.0
-    min_click_interval = 0.3
-    pinch_threshold = 0.04
+    input_settings = cfg["input"]
+    drawing_enabled = cfg["drawing"]["enabled"]
     
     # Scroll state
     prev_mid_y = None
@@ -325,59 +566,227 @@ def main(web_mode=False):
     namaskar_counter = 0
     close_app = False
     
-    # Drawing state
-    last_draw_pos = None
-    last_clear_time = 0.0
-    
     # Cheating detection
     head_movement_count = 0
     last_head_movement_time = 0.0
     
-    # Start voice recognition thread if available
-    if SPEECH_AVAILABLE:
-        voice_thread = threading.Thread(target=voice_command_handler, daemon=True)
-        voice_thread.start()
-        print("🎤 Voice recognition started!")
-    else:
-        print("🎤 Voice recognition disabled.")
+    # Voice commands are recognized on their own thread and executed here
+    voice_commands = queue.Queue(maxsize=16)
+    
+    def start_voice(voice_settings):
+        pipeline = create_voice_pipeline(voice_settings, voice_commands)
+        if pipeline is None:
+            print("🎤 Voice recognition disabled.")
+            return None
+        print(f"🎤 Voice recognition started ({pipeline.recognizer.name})!")
+        return pipeline.start()
+    
+    voice = start_voice(cfg["voice"])
+    
+    # Stage factories, also used to rebuild stages when settings change
+    yolo_args = {"conf": cfg["objects"]["conf"], "imgsz": cfg["objects"]["imgsz"]}
+    
+    def detect(frame):
+        return detect_objects(frame, **yolo_args)
+    
+    def create_object_detector(object_settings):
+        # Synchronous detection unless the background worker + tracker is enabled
+        if not object_settings["async"]:
+            return None
+        if object_settings["processes"] > 0:
+            return ProcessObjectDetector(
+                workers=object_settings["processes"],
+                interval=object_settings["interval"],
+                max_age=object_settings["max_age"],
+                **yolo_args
+            )
+        return AsyncObjectDetector(
+            detect,
+            interval=object_settings["interval"],
+            max_age=object_settings["max_age"]
+        )
+    
+    def create_hands(hand_settings):
+        return mp_hands.Hands(
+            static_image_mode=False,
+            max_num_hands=2,
+            min_detection_confidence=hand_settings["min_detection_confidence"],
+            min_tracking_confidence=hand_settings["min_tracking_confidence"]
+        )
+    
+    def create_face_mesh(face_settings):
+        return mp_face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            min_detection_confidence=face_settings["min_detection_confidence"],
+            min_tracking_confidence=face_settings["min_tracking_confidence"]
+        )
+    
+    def create_hand_tracker(hands, hand_settings):
+        if not hand_settings["roi"]:
+            return None
+        # Crops get their own Hands so tracking never mixes coordinate spaces
+        return HandROITracker(
+            hands,
+            create_hands(hand_settings),
+            padding=hand_settings["padding"],
+            min_size=hand_settings["min_size"],
+            full_frame_every=hand_settings["full_frame_every"]
+        )
+    
+    def create_face_scheduler(face_mesh, face_settings):
+        return FaceAnalysisScheduler(
+            face_mesh, analyze_face,
+            every_n=face_settings["every_n"],
+            target_hz=face_settings["target_hz"],
+            crop=face_settings["crop"],
+            interpolate=face_settings["interpolate"]
+        )
+    
+    object_detector = create_object_detector(cfg["objects"])
+    
+    def object_stage(frame, rgb):
+        if object_detector is None:
+            detected = detect(frame)
+        else:
+            detected = object_detector.update(frame)
+        if draw_overlays:
+            draw_object_detections(frame, detected)
+        return frame, detected
     
     # Initialize MediaPipe solutions
-    with mp_hands.Hands(
-        static_image_mode=False,
-        max_num_hands=2,
-        min_detection_confidence=0.7,
-        min_tracking_confidence=0.7
-    ) as hands, \
-    mp_face_mesh.FaceMesh(
-        static_image_mode=False,
-        max_num_faces=1,
-        min_detection_confidence=0.7,
-        min_tracking_confidence=0.7
-    ) as face_mesh:
+    hands = create_hands(cfg["hands"])
+    face_mesh = create_face_mesh(cfg["face"])
+    executor = None
+    hand_tracker = None
+    try:
+        hand_tracker = create_hand_tracker(hands, cfg["hands"])
+        face_scheduler = create_face_scheduler(face_mesh, cfg["face"])
+        
+        executor = StagedInferenceExecutor({
+            "hands": lambda frame, rgb: (hand_tracker or hands).process(rgb),
+            "face": lambda frame, rgb: face_scheduler.process(rgb),
+            "objects": object_stage,
+        })
         
         print("🎯 VisioSense is running! Make gestures in front of the camera.")
         
-        while True:
+        # Telemetry
+        if result_queue is not None:
+            metrics.QUEUE_DEPTH.labels(queue="results").set_function(result_queue.qsize)
+        if frame_bus is not None:
+            metrics.QUEUE_DEPTH.labels(queue="engine_raw").set_function(cap.pending)
+        metrics.QUEUE_DEPTH.labels(queue="input").set_function(injector.pending)
+        fps = 0.0
+        last_frame_end = None
+        
+        def apply_settings(new, old):
+            """Bring the stages from settings `old` to settings `new`."""
+            nonlocal hands, face_mesh, hand_tracker, face_scheduler, object_detector
+            nonlocal cursor_filter, voice, input_settings, drawing_enabled
+            if own_camera and new["capture"] != old["capture"]:
+                apply_capture_settings(cap, new["capture"])
+            
+            if new["hands"] != old["hands"]:
+                if any(new["hands"][key] != old["hands"][key] for key in MP_CONFIDENCE_KEYS):
+                    hands.close()
+                    hands = create_hands(new["hands"])
+                if hand_tracker is not None:
+                    hand_tracker.close()
+                    hand_tracker = None
+                hand_tracker = create_hand_tracker(hands, new["hands"])
+            
+            if new["face"] != old["face"]:
+                if any(new["face"][key] != old["face"][key] for key in MP_CONFIDENCE_KEYS):
+                    face_mesh.close()
+                    face_mesh = create_face_mesh(new["face"])
+                face_scheduler = create_face_scheduler(face_mesh, new["face"])
+            
+            if new["objects"] != old["objects"]:
+                yolo_args.update(conf=new["objects"]["conf"], imgsz=new["objects"]["imgsz"])
+                if any(new["objects"][key] != old["objects"][key] for key in ("async", "processes")):
+                    if object_detector is not None:
+                        object_detector.stop()
+                    object_detector = create_object_detector(new["objects"])
+                elif object_detector is not None:
+                    object_detector.interval = new["objects"]["interval"]
+                    object_detector.max_age = new["objects"]["max_age"]
+                    if isinstance(object_detector, ProcessObjectDetector):
+                        object_detector.configure(**yolo_args)
+            
+            gesture_engine.configure(**gesture_params(new["gestures"]))
+            
+            if new["cursor"]["filter"] != old["cursor"]["filter"]:
+                cursor_filter = create_filter(new["cursor"]["filter"], new["cursor"]["smoothing"])
+            else:
+                cursor_filter.set_smoothing(new["cursor"]["smoothing"])
+            
+            if new["voice"] != old["voice"]:
+                if voice is not None:
+                    voice.stop()
+                voice = start_voice(new["voice"])
+            
+            input_settings = new["input"]
+            drawing_enabled = new["drawing"]["enabled"]
+            if not drawing_enabled:
+                whiteboard.lift()
+        
+        while stop_event is None or not stop_event.is_set():
+            # Pick up settings changes at the frame boundary (no stage is running)
+            if config.version != config_version:
+                previous = cfg
+                config_version, cfg = config.snapshot()
+                try:
+                    apply_settings(cfg, previous)
+                    print(f"⚙️  Settings updated (version {config_version})")
+                except Exception as e:
+                    # Put the stages back as they were and drop the change
+                    print(f"⚠️  Could not apply settings (version {config_version}): {e}")
+                    failed, cfg = cfg, previous
+                    apply_settings(cfg, failed)
+                    config_version = config.restore(cfg)
+            
             ret, frame = cap.read()
             if not ret:
                 print("❌ Failed to read frame from camera")
                 break
+            frame_start = time.perf_counter()
+            if frame_bus is None:
+                metrics.FRAMES_CAPTURED.inc()
             
             # Flip frame horizontally for mirror effect
             frame = cv2.flip(frame, 1)
             h, w, _ = frame.shape
             
-            # Initialize canvas for drawing
-            if canvas is None:
-                canvas = np.zeros_like(frame)
+            # Execute recognized voice commands
+            while True:
+                try:
+                    command = voice_commands.get_nowait()
+                except queue.Empty:
+                    break
+                if command.name == "open_url":
+                    webbrowser.open(command.arg)
+                elif command.name == "mode":
+                    if command.arg == "mouse" and not mouse_mode:
+                        cursor_filter.reset()
+                    mouse_mode = command.arg == "mouse"
+                    whiteboard_mode = not mouse_mode
+                elif command.name in ("undo", "redo", "clear"):
+                    getattr(whiteboard, command.name)()
+                elif command.name == "save":
+                    save_whiteboard(whiteboard, w, h)
             
             # Convert BGR to RGB for MediaPipe
             rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            hand_results = hands.process(rgb)
-            face_results = face_mesh.process(rgb)
             
-            # Run object detection
-            frame, detected_objects = process_object_detection(frame)
+            # Run hands, face mesh and object detection in parallel, then join
+            stage_results = executor.run(frame, rgb)
+            hand_results = stage_results["hands"]
+            face_analysis = stage_results["face"]
+            frame, detected_objects = stage_results["objects"]
+            for stage_name, model_name in (("hands", "hands"), ("face", "face_mesh")):
+                if stage_name in executor.last_timings:
+                    metrics.INFERENCE_SECONDS.labels(model=model_name).observe(executor.last_timings[stage_name])
             
             # Get hand landmarks and handedness
             multi_hand_landmarks = hand_results.multi_hand_landmarks
@@ -389,17 +798,14 @@ def main(web_mode=False):
             total_fingers = 0
             cheating_detected = False
             stable_gesture = None
+            gesture_events = []
             finger_count = 0
             
             # Face detection and expression analysis
-            if face_results.multi_face_landmarks:
-                face_landmarks = face_results.multi_face_landmarks[0]
-                
-                # Detect facial expression
-                current_expression = detect_facial_expression(face_landmarks.landmark)
-                
-                # Calculate head angle for cheating detection
-                head_angle = calculate_face_angle(face_landmarks.landmark)
+            # (held or interpolated between FaceMesh runs by the face scheduler)
+            if face_analysis:
+                current_expression = face_analysis['expression']
+                head_angle = face_analysis['head_angle']
                 
                 # Cheating detection: head movement < 20 degrees or equal to 0
                 if abs(head_angle) < 20 or abs(head_angle) == 0:
@@ -414,13 +820,21 @@ def main(web_mode=False):
                     # Detect cheating if more than 2 head movements
                     if head_movement_count > 2:
                         cheating_detected = True
-                        cv2.putText(frame, "CHEATING DETECTED!", (w//2 - 150, h//2 - 50), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
-                        cv2.rectangle(frame, (w//2 - 200, h//2 - 80), (w//2 + 200, h//2 + 20), (0, 0, 255), 3)
+                        if draw_overlays:
+                            cv2.putText(frame, "CHEATING DETECTED!", (w//2 - 150, h//2 - 50), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
+                            cv2.rectangle(frame, (w//2 - 200, h//2 - 80), (w//2 + 200, h//2 + 20), (0, 0, 255), 3)
             
             if multi_hand_landmarks:
+                # Convert landmarks to a (hands, 21, 3) array once per frame
+                hand_array = landmarks_to_array(multi_hand_landmarks)
+                is_right = np.array([
+                    (multi_handedness[i].classification[0].label if multi_handedness else "Right") == "Right"
+                    for i in range(len(hand_array))
+                ])
+                
                 # Check for Namaskar gesture (both hands close)
-                if len(multi_hand_landmarks) == 2 and detect_namaskar(multi_hand_landmarks[0], multi_hand_landmarks[1]):
+                if len(hand_array) == 2 and detect_namaskar(hand_array[0], hand_array[1]):
                     namaskar_counter += 1
                     if namaskar_counter > 20:
                         close_app = True
@@ -428,62 +842,52 @@ def main(web_mode=False):
                     namaskar_counter = 0
                 
                 # Process all hands for finger counting and gesture detection
-                total_fingers = 0
+                counts, _, gestures = classify_hands(hand_array, is_right)
+                total_fingers = int(counts.sum())
                 
-                for i, hand_landmarks in enumerate(multi_hand_landmarks):
-                    handedness = multi_handedness[i].classification[0].label if multi_handedness else "Right"
-                    count, finger_bits = count_fingers(hand_landmarks, handedness)
-                    total_fingers += count
-                    
-                    gesture = detect_gesture(finger_bits, hand_landmarks)
-                    
-                    # Use first hand for primary gesture detection
-                    if i == 0:
-                        finger_count = count
-                        if gesture:
-                            GESTURE_HISTORY.append(gesture)
-                
-                stable_gesture = majority(GESTURE_HISTORY)
+                # Use first hand for primary gesture detection
+                finger_count = int(counts[0])
+                gesture_events = gesture_engine.update(str(gestures[0]), time.time())
+                stable_gesture = gesture_engine.active
                 
-                # Mode detection
-                if stable_gesture == "Fist":
-                    mouse_mode = True
-                    whiteboard_mode = False
-                elif stable_gesture == "Open Hand":
-                    whiteboard_mode = True
-                    mouse_mode = False
-                else:
-                    # Default to whiteboard mode for drawing and scrolling
-                    whiteboard_mode = True
-                    mouse_mode = False
+                # Mode detection: switch only when a new gesture starts
+                for event in gesture_events:
+                    if event.kind == "start":
+                        # Fist -> mouse mode, anything else -> whiteboard mode
+                        if event.gesture == "Fist" and not mouse_mode:
+                            # Jump straight to the hand instead of gliding from a stale position
+                            cursor_filter.reset()
+                        mouse_mode = event.gesture == "Fist"
+                        whiteboard_mode = not mouse_mode
                 
                 # Draw hand landmarks
-                for hand_landmarks in multi_hand_landmarks:
-                    mp_drawing.draw_landmarks(
-                        frame, hand_landmarks, mp_hands.HAND_CONNECTIONS,
-                        mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                        mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
-                    )
+                if draw_overlays:
+                    for hand_landmarks in multi_hand_landmarks:
+                        mp_drawing.draw_landmarks(
+                            frame, hand_landmarks, mp_hands.HAND_CONNECTIONS,
+                            mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
+                            mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
+                        )
             else:
-                # Clear gesture history when no hands detected
-                GESTURE_HISTORY.clear()
+                # Vote for "no gesture" so the active gesture ends after its exit dwell
+                gesture_events = gesture_engine.update(None, time.time())
                 namaskar_counter = 0
                 prev_mid_y = None
                 scroll_accum = 0.0
-                last_draw_pos = None
+                whiteboard.lift()
             
-            # Overlay canvas (drawing) on frame
-            frame = cv2.add(frame, canvas)
+            # Overlay canvas (drawing) on frame, only where there is ink
+            if draw_overlays:
+                whiteboard.composite(frame)
             
             # Process gestures and actions
             if stable_gesture and multi_hand_landmarks:
-                primary_hand = multi_hand_landmarks[0]
-                landmarks = primary_hand.landmark
+                primary_hand = hand_array[0]
                 
                 # Get key landmark positions
-                index_tip = landmarks[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-                middle_tip = landmarks[mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-                thumb_tip = landmarks[mp_hands.HandLandmark.THUMB_TIP]
+                index_tip = Landmark(*primary_hand[HandLandmark.INDEX_FINGER_TIP].tolist())
+                middle_tip = Landmark(*primary_hand[HandLandmark.MIDDLE_FINGER_TIP].tolist())
+                thumb_tip = Landmark(*primary_hand[HandLandmark.THUMB_TIP].tolist())
                 
                 # Calculate distances
                 d_thumb_index = dist(thumb_tip, index_tip)
@@ -496,19 +900,14 @@ def main(web_mode=False):
                     raw_x = np.interp(index_tip.x, [margin, 1 - margin], [0, screen_w])
                     raw_y = np.interp(index_tip.y, [margin, 1 - margin], [0, screen_h])
                     
-                    # Smooth cursor movement
-                    mouse_x = prev_mouse_x + (raw_x - prev_mouse_x) * 0.4
-                    mouse_y = prev_mouse_y + (raw_y - prev_mouse_y) * 0.4
+                    # Smooth cursor movement using the real frame time
+                    mouse_x, mouse_y = cursor_filter(raw_x, raw_y, frame_start)
                     
-                    try:
-                        pyautogui.moveTo(mouse_x, mouse_y)
-                    except Exception:
-                        pass
-                    
-                    prev_mouse_x, prev_mouse_y = mouse_x, mouse_y
+                    # Prediction may overshoot the screen edges
+                    injector.move(min(max(mouse_x, 0), screen_w - 1), min(max(mouse_y, 0), screen_h - 1))
                     
                     # Pinch handling - Click and Drag
-                    pinch_now = (d_thumb_index < pinch_threshold)
+                    pinch_now = (d_thumb_index < input_settings["pinch_threshold"])
                     
                     # Start pinch
                     if pinch_now and not pinch_down:
@@ -518,39 +917,30 @@ def main(web_mode=False):
                     # Release pinch
                     if not pinch_now and pinch_down:
                         if drag_active:
-                            try:
-                                pyautogui.mouseUp()
-                            except Exception:
-                                pass
+                            injector.mouse_up()
                             drag_active = False
                         else:
                             # Click on release with debouncing
-                            if time.time() - last_click_time > min_click_interval:
-                                try:
-                                    pyautogui.click()
-                                except Exception:
-                                    pass
+                            if time.time() - last_click_time > input_settings["min_click_interval"]:
+                                injector.click()
                                 last_click_time = time.time()
                         pinch_down = False
                     
                     # Long pinch -> start drag
                     if pinch_now and pinch_down and not drag_active:
-                        if time.time() - pinch_start > 0.6:
-                            try:
-                                pyautogui.mouseDown()
-                                drag_active = True
-                            except Exception:
-                                drag_active = False
+                        if time.time() - pinch_start > input_settings["drag_hold"]:
+                            injector.mouse_down()
+                            drag_active = True
                     
                     # Visual feedback for mouse mode
                     px, py = int(index_tip.x * w), int(index_tip.y * h)
-                    if pinch_down:
+                    if draw_overlays and pinch_down:
                         color = (0, 0, 255) if drag_active else (0, 255, 255)
                         cv2.circle(frame, (px, py), 20, color, 3)
                         if drag_active:
                             cv2.putText(frame, "DRAGGING", (px + 25, py), 
                                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                    else:
+                    elif draw_overlays:
                         cv2.circle(frame, (px, py), 10, (255, 0, 255), -1)
                 
                 # WHITEBOARD MODE - Handle drawing and scrolling (Open Hand gesture)
@@ -560,79 +950,116 @@ def main(web_mode=False):
                         if prev_mid_y is not None:
                             dy = prev_mid_y - mid_y
                             scroll_accum += dy * 1000
-                            if abs(scroll_accum) > 50:
-                                try:
-                                    pyautogui.scroll(int(scroll_accum))
-                                except Exception:
-                                    pass
+                            if abs(scroll_accum) > input_settings["scroll_threshold"]:
+                                injector.scroll(scroll_accum)
                                 scroll_accum = 0.0
                         prev_mid_y = mid_y
                         
                         # Also handle clicking with two fingers
-                        if d_thumb_index < pinch_threshold:
-                            if time.time() - last_click_time > min_click_interval:
-                                try:
-                                    pyautogui.click()
-                                except Exception:
-                                    pass
+                        if d_thumb_index < input_settings["pinch_threshold"]:
+                            if time.time() - last_click_time > input_settings["min_click_interval"]:
+                                injector.click()
                                 last_click_time = time.time()
                         
                         # Visual feedback for scrolling and clicking
-                        cv2.putText(frame, "SCROLLING & CLICKING", (10, 150), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                        if draw_overlays:
+                            cv2.putText(frame, "SCROLLING & CLICKING", (10, 150), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
                     else:
                         prev_mid_y = None
                         scroll_accum = 0.0
                     
                     # Index pointing -> draw on canvas (ONLY single index finger)
-                    if stable_gesture == "Index Pointing":
+                    if stable_gesture == "Index Pointing" and drawing_enabled:
                         ix, iy = int(index_tip.x * w), int(index_tip.y * h)
-                        cv2.circle(frame, (ix, iy), 12, (0, 0, 255), cv2.FILLED)
+                        if draw_overlays:
+                            cv2.circle(frame, (ix, iy), 12, (0, 0, 255), cv2.FILLED)
                         
-                        # Draw on canvas
-                        if last_draw_pos is None:
-                            last_draw_pos = (ix, iy)
-                        cv2.line(canvas, last_draw_pos, (ix, iy), (0, 0, 255), 8)
-                        last_draw_pos = (ix, iy)
+                        # Draw on canvas (normalized, so strokes render at any resolution)
+                        whiteboard.draw_to(index_tip.x, index_tip.y)
                         
                         # Visual feedback for drawing
-                        cv2.putText(frame, "DRAWING", (10, 150), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                        if draw_overlays:
+                            cv2.putText(frame, "DRAWING", (10, 150), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
                     else:
-                        last_draw_pos = None
+                        whiteboard.lift()
                     
-                    # Clear canvas with Open Hand (debounced)
-                    if stable_gesture == "Open Hand":
-                        if time.time() - last_clear_time > 1.0:
-                            canvas[:] = 0
-                            last_clear_time = time.time()
+                    # Clear canvas once when an Open Hand gesture starts
+                    if any(event.kind == "start" and event.gesture == "Open Hand"
+                           for event in gesture_events):
+                        whiteboard.clear()
             
             # Draw status overlay
-            mode_text = "Mouse Mode" if mouse_mode else "Whiteboard Mode"
-            mode_color = (0, 255, 0) if mouse_mode else (255, 0, 255)
-            cv2.putText(frame, f"Mode: {mode_text}", (10, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, mode_color, 2)
-            cv2.putText(frame, f"Gesture: {stable_gesture or 'None'}", (10, 60), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-            cv2.putText(frame, f"Fingers: {finger_count}", (10, 90), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+            if draw_overlays:
+                mode_text = "Mouse Mode" if mouse_mode else "Whiteboard Mode"
+                mode_color = (0, 255, 0) if mouse_mode else (255, 0, 255)
+                cv2.putText(frame, f"Mode: {mode_text}", (10, 30), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, mode_color, 2)
+                cv2.putText(frame, f"Gesture: {stable_gesture or 'None'}", (10, 60), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+                cv2.putText(frame, f"Fingers: {finger_count}", (10, 90), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
             
-            if total_fingers > 0:
-                cv2.putText(frame, f"Total Fingers: {total_fingers}/10", (10, 120), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                if total_fingers > 0:
+                    cv2.putText(frame, f"Total Fingers: {total_fingers}/10", (10, 120), 
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
             
-            if current_expression:
-                expression_color = (0, 255, 0) if current_expression == "Happy" else (0, 0, 255) if current_expression == "Sad" else (255, 255, 255)
-                cv2.putText(frame, f"Expression: {current_expression}", (w - 200, 30), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, expression_color, 2)
+                if current_expression:
+                    expression_color = (0, 255, 0) if current_expression == "Happy" else (0, 0, 255) if current_expression == "Sad" else (255, 255, 255)
+                    cv2.putText(frame, f"Expression: {current_expression}", (w - 200, 30), 
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, expression_color, 2)
             
-            cv2.putText(frame, f"Head Angle: {head_angle:.1f}°", (w - 200, 60), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                cv2.putText(frame, f"Head Angle: {head_angle:.1f}°", (w - 200, 60), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            
+                # Show closing message
+                if namaskar_counter > 1:
+                    cv2.putText(frame, "Namaskar detected - Closing...", 
+                               (w//2 - 200, h//2), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
+            
+            # Publish per-frame results for headless consumers
+            if on_result is not None or result_queue is not None:
+                result = {
+                    'timestamp': time.time(),
+                    'mode': "Mouse Mode" if mouse_mode else "Whiteboard Mode",
+                    'gesture': stable_gesture,
+                    'gesture_events': [event._asdict() for event in gesture_events],
+                    'fingers': finger_count,
+                    'total_fingers': total_fingers,
+                    'expression': current_expression,
+                    'head_angle': head_angle,
+                    'cheating': cheating_detected,
+                    'objects': detected_objects,
+                    'fps': round(fps, 1),
+                    'resolution': (w, h),
+                }
+                if on_result is not None:
+                    on_result(result)
+                if result_queue is not None:
+                    try:
+                        result_queue.put_nowait(result)
+                    except queue.Full:
+                        pass
             
-            # Show closing message
-            if namaskar_counter > 1:
-                cv2.putText(frame, "Namaskar detected - Closing...", 
-                           (w//2 - 200, h//2), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
+            # Share the annotated frame with stream subscribers (no copy)
+            if frame_bus is not None:
+                # Keep the capture time so stream clients can measure glass-to-glass latency
+                frame_bus.publish("annotated", frame, timestamp=cap.last_timestamp)
+            
+            # Frame timing and smoothed FPS
+            frame_end = time.perf_counter()
+            metrics.FRAMES_PROCESSED.inc()
+            metrics.FRAME_SECONDS.observe(frame_end - frame_start)
+            if last_frame_end is not None and frame_end > last_frame_end:
+                fps = 0.9 * fps + 0.1 / (frame_end - last_frame_end) if fps else 1.0 / (frame_end - last_frame_end)
+                metrics.ENGINE_FPS.set(round(fps, 1))
+            last_frame_end = frame_end
+            
+            if headless:
+                if close_app:
+                    break
+                continue
             
             # Display frame
             cv2.imshow("VisioSense - Hand Gesture Control", frame)
@@ -645,20 +1072,69 @@ def main(web_mode=False):
             if key == ord('m'):  # Press 'm' to minimize
                 cv2.setWindowProperty("VisioSense - Hand Gesture Control", cv2.WND_PROP_FULLSCREEN, 
                                    cv2.WINDOW_MINIMIZED)
+            elif key == ord('u'):  # Press 'u' to undo the last stroke
+                whiteboard.undo()
+            elif key == ord('r'):  # Press 'r' to redo
+                whiteboard.redo()
+            elif key == ord('s'):  # Press 's' to save the whiteboard as PNG and SVG
+                save_whiteboard(whiteboard, w, h)
             elif key in (27, ord('q')) or close_app:
                 break
-    
-    # Cleanup
-    cap.release()
-    cv2.destroyAllWindows()
+    finally:
+        # Cleanup, also when the loop fails (never leave the mouse button held down)
+        if drag_active:
+            injector.mouse_up()
+        injector.stop()
+        if executor is not None:
+            executor.shutdown()
+        if hand_tracker is not None:
+            hand_tracker.close()
+        hands.close()
+        face_mesh.close()
+        if object_detector is not None:
+            object_detector.stop()
+        if voice is not None:
+            voice.stop()
+        cap.release()
+        if not headless:
+            cv2.destroyAllWindows()
     print("👋 VisioSense closed successfully!")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="VisioSense - Hand Gesture Control System")
+    parser.add_argument("--source", default=None,
+                        help="camera index, video file, image folder or 'synthetic[:WxH]' (default: webcam 0)")
+    parser.add_argument("--fast", action="store_true",
+                        help="read file sources as fast as possible instead of in real time")
+    parser.add_argument("--headless", action="store_true", help="run without a display window")
+    parser.add_argument("--input", choices=sorted(INPUT_BACKENDS), default=None,
+                        help="mouse control backend (default: pyautogui if available, else null)")
+    parser.add_argument("--detector-processes", type=int, default=None, metavar="N",
+                        help="run YOLO in N worker processes fed through shared memory")
+    parser.add_argument("--voice", default=None, metavar="BACKEND",
+                        help="voice recognizer: auto, vosk, sphinx, google, scripted or 'off'")
+    parser.add_argument("--voice-model", default=None,
+                        help="Vosk model directory (or phrase file for the scripted recognizer)")
+    parser.add_argument("--voice-wav", default=None, help="read voice commands from a WAV file")
+    args = parser.parse_args()
+    if args.detector_processes is not None:
+        settings.update({"objects": {"processes": args.detector_processes}})
+    if args.voice == "off":
+        settings.update({"voice": {"enabled": False}})
+    elif args.voice is not None:
+        settings.update({"voice": {"backend": args.voice}})
+    if args.voice_model is not None:
+        settings.update({"voice": {"model": args.voice_model}})
+    if args.voice_wav is not None:
+        settings.update({"voice": {"source": args.voice_wav}})
+    
     try:
-        main()
+        source = open_source(args.source, realtime=not args.fast) if args.source is not None else None
+        main(headless=args.headless, source=source, input_backend=args.input)
     except KeyboardInterrupt:
         print("\n👋 VisioSense interrupted by user")
     except Exception as e:
         print(f"❌ An error occurred: {e}")
     finally:
-        cv2.destroyAllWindows()
\ No newline at end of file
+        if not args.headless:
+            cv2.destroyAllWindows()
\ No newline at end of file
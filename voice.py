@@ -0,0 +1,420 @@
+"""
+VisioSense - Voice Commands
+==================================================
+
+Speech-gated, offline-capable voice commands.
+
+Audio is read in short chunks (30 ms) from the microphone or a WAV file.
+`EnergyVAD` tracks the background noise level and only hands complete
+speech segments to the recognizer, so the recognizer (the expensive part)
+runs once per phrase instead of on every second of silence. Recognized
+text is matched against a command table and the resulting VoiceCommand
+is put on a queue; the frame loop executes it, never the audio thread.
+
+Recognizer backends:
+- "vosk":     offline (Kaldi), needs the `vosk` package and a model directory
+- "sphinx":   offline CMU PocketSphinx through SpeechRecognition
+- "google":   Google Web Speech API through SpeechRecognition (online)
+- "scripted": returns phrases from a list or text file, one per speech
+              segment; pair it with a WAV file source for tests
+- "auto":     vosk if a model is configured, else sphinx if installed
+"""
+
+import collections
+import json
+import queue
+import re
+import threading
+import time
+import wave
+
+import numpy as np
+
+import metrics
+
+# Try to import speech recognition (microphone access and the sphinx/google backends)
+try:
+    import speech_recognition as sr
+    SPEECH_AVAILABLE = True
+except ImportError:
+    print("⚠️  SpeechRecognition module not found. Microphone voice commands will be disabled.")
+    SPEECH_AVAILABLE = False
+    sr = None
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 0.03
+
+VoiceCommand = collections.namedtuple('VoiceCommand', ['name', 'arg', 'text', 'timestamp'])
+
+# (pattern, command, argument): patterns are regular expressions matched as
+# whole words anywhere in the lower-cased transcript; the first match wins
+VOICE_COMMANDS = [
+    (r"open youtube", "open_url", "https://youtube.com"),
+    (r"open google", "open_url", "https://google.com"),
+    (r"open whatsapp", "open_url", "https://web.whatsapp.com"),
+    (r"mouse mode", "mode", "mouse"),
+    (r"(whiteboard|drawing) mode", "mode", "whiteboard"),
+    (r"clear (the )?(board|whiteboard|canvas)", "clear", None),
+    (r"save (the )?(board|whiteboard|drawing)", "save", None),
+    (r"undo", "undo", None),
+    (r"redo", "redo", None),
+]
+
+
+# ===== AUDIO SOURCES =====
+class MicrophoneSource:
+    """16-bit mono chunks from the default microphone (via SpeechRecognition/PyAudio)."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS):
+        if not SPEECH_AVAILABLE:
+            raise RuntimeError("SpeechRecognition is not installed")
+        self.sample_rate = sample_rate
+        self.chunk = int(sample_rate * chunk_seconds)
+        self._microphone = None
+
+    def open(self):
+        self._microphone = sr.Microphone(sample_rate=self.sample_rate, chunk_size=self.chunk)
+        self._microphone.__enter__()
+
+    def read(self):
+        # Blocks for one chunk of audio, so the reader never spins
+        return self._microphone.stream.read(self.chunk)
+
+    def close(self):
+        if self._microphone is not None:
+            self._microphone.__exit__(None, None, None)
+            self._microphone = None
+
+
+class WavFileSource:
+    """Chunks from a 16-bit PCM WAV file (stereo is mixed down); b"" at the end."""
+
+    def __init__(self, path, chunk_seconds=CHUNK_SECONDS, realtime=False):
+        self.path = path
+        self.chunk_seconds = chunk_seconds
+        self.realtime = realtime
+        self.sample_rate = None
+        self._wav = None
+
+    def open(self):
+        self._wav = wave.open(self.path, "rb")
+        if self._wav.getsampwidth() != 2:
+            raise ValueError(f"{self.path}: only 16-bit PCM WAV files are supported")
+        self.sample_rate = self._wav.getframerate()
+        self.chunk = int(self.sample_rate * self.chunk_seconds)
+
+    def read(self):
+        data = self._wav.readframes(self.chunk)
+        channels = self._wav.getnchannels()
+        if channels > 1 and data:
+            samples = np.frombuffer(data, dtype=np.int16).reshape(-1, channels)
+            data = samples.mean(axis=1).astype(np.int16).tobytes()
+        if self.realtime and data:
+            time.sleep(len(data) / 2 / self.sample_rate)
+        return data
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+# ===== VOICE ACTIVITY DETECTION =====
+class EnergyVAD:
+    """Cut an audio stream into speech segments by RMS energy.
+
+    A chunk counts as speech when its RMS is `ratio` times the adaptive
+    noise floor (and at least `min_energy`). A segment ends after
+    `hangover` seconds of silence or at `max_phrase` seconds, and is kept
+    only if it holds at least `min_speech` seconds of speech. `pre_roll`
+    seconds before the first loud chunk are included so soft word onsets
+    aren't cut off.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, ratio=3.0, min_energy=300.0, hangover=0.4,
+                 min_speech=0.15, max_phrase=4.0, pre_roll=0.2, noise_adapt=0.05):
+        self.sample_rate = sample_rate
+        self.ratio = ratio
+        self.min_energy = min_energy
+        self.hangover = hangover
+        self.min_speech = min_speech
+        self.max_phrase = max_phrase
+        self.pre_roll = pre_roll
+        self.noise_adapt = noise_adapt
+        self.noise_floor = None
+        self._pre = collections.deque()
+        self._pre_seconds = 0.0
+        self._segment = []
+        self._segment_seconds = 0.0
+        self._speech_seconds = 0.0
+        self._silence_seconds = 0.0
+
+    @property
+    def in_speech(self):
+        return bool(self._segment)
+
+    def process(self, chunk):
+        """Feed one chunk of 16-bit PCM; returns a finished speech segment (bytes) or None."""
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        if not len(samples):
+            return None
+        seconds = len(samples) / self.sample_rate
+        rms = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        loud = rms >= max(self.min_energy, self.noise_floor * self.ratio)
+
+        if not self._segment:
+            if not loud:
+                # Only silence moves the noise floor, so speech can't raise its own threshold
+                self.noise_floor += (rms - self.noise_floor) * self.noise_adapt
+                self._pre.append(chunk)
+                self._pre_seconds += seconds
+                while self._pre_seconds > self.pre_roll and len(self._pre) > 1:
+                    self._pre_seconds -= len(self._pre.popleft()) / 2 / self.sample_rate
+                return None
+            self._segment = list(self._pre)
+            self._segment_seconds = self._pre_seconds
+            self._pre.clear()
+            self._pre_seconds = 0.0
+
+        self._segment.append(chunk)
+        self._segment_seconds += seconds
+        if loud:
+            self._speech_seconds += seconds
+            self._silence_seconds = 0.0
+        else:
+            self._silence_seconds += seconds
+        if self._silence_seconds >= self.hangover or self._segment_seconds >= self.max_phrase:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """End the current segment now; returns it if it holds enough speech."""
+        segment = b"".join(self._segment) if self._speech_seconds >= self.min_speech else None
+        self._segment = []
+        self._segment_seconds = 0.0
+        self._speech_seconds = 0.0
+        self._silence_seconds = 0.0
+        return segment
+
+
+# ===== RECOGNIZERS =====
+class Recognizer:
+    """Base class: turn one speech segment (16-bit mono PCM) into text ("" if nothing)."""
+
+    name = None
+
+    def transcribe(self, pcm, sample_rate):
+        raise NotImplementedError
+
+
+class VoskRecognizer(Recognizer):
+    """Offline recognition with Vosk; `model` is the path to a Vosk model directory."""
+
+    name = "vosk"
+
+    def __init__(self, model):
+        import vosk
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model)
+        self._vosk = vosk
+
+    def transcribe(self, pcm, sample_rate):
+        recognizer = self._vosk.KaldiRecognizer(self.model, sample_rate)
+        recognizer.AcceptWaveform(pcm)
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+class SpeechRecognitionRecognizer(Recognizer):
+    """A SpeechRecognition engine, selected by `method` (e.g. "recognize_sphinx")."""
+
+    method = None
+
+    def __init__(self, model=None):
+        if not SPEECH_AVAILABLE:
+            raise RuntimeError("SpeechRecognition is not installed")
+        self._recognizer = sr.Recognizer()
+
+    def transcribe(self, pcm, sample_rate):
+        audio = sr.AudioData(pcm, sample_rate, 2)
+        try:
+            return getattr(self._recognizer, self.method)(audio)
+        except sr.UnknownValueError:
+            return ""
+
+
+class SphinxRecognizer(SpeechRecognitionRecognizer):
+    name = "sphinx"
+    method = "recognize_sphinx"
+
+    def __init__(self, model=None):
+        import pocketsphinx  # noqa: F401 - fail early instead of on the first phrase
+        super().__init__(model)
+
+
+class GoogleRecognizer(SpeechRecognitionRecognizer):
+    name = "google"
+    method = "recognize_google"
+
+
+class ScriptedRecognizer(Recognizer):
+    """Return the next phrase for every speech segment (for tests and demos).
+
+    `model` is a list of phrases or the path of a text file with one phrase per line.
+    """
+
+    name = "scripted"
+
+    def __init__(self, model=()):
+        if isinstance(model, str):
+            with open(model) as f:
+                model = [line.strip() for line in f if line.strip()]
+        self._phrases = collections.deque(model)
+        self.segments = []
+
+    def transcribe(self, pcm, sample_rate):
+        self.segments.append(len(pcm) / 2 / sample_rate)
+        return self._phrases.popleft() if self._phrases else ""
+
+
+RECOGNIZERS = {
+    "vosk": VoskRecognizer,
+    "sphinx": SphinxRecognizer,
+    "google": GoogleRecognizer,
+    "scripted": ScriptedRecognizer,
+}
+
+
+def create_recognizer(name="auto", model=""):
+    """Create a recognizer by name; "auto" picks the first offline engine available (or None)."""
+    if name != "auto":
+        if name not in RECOGNIZERS:
+            raise ValueError(f"Unknown voice recognizer: {name}")
+        return RECOGNIZERS[name](model)
+    candidates = (["vosk"] if model else []) + ["sphinx"]
+    for candidate in candidates:
+        try:
+            return RECOGNIZERS[candidate](model)
+        except Exception as e:
+            print(f"⚠️  {candidate} voice recognizer not available: {e}")
+    return None
+
+
+# ===== COMMANDS =====
+class CommandMatcher:
+    """Map transcripts to commands with a table of (pattern, command, argument)."""
+
+    def __init__(self, table=VOICE_COMMANDS):
+        self.table = [(re.compile(rf"\b(?:{pattern})\b"), name, arg) for pattern, name, arg in table]
+
+    def match(self, text, timestamp=None):
+        """Return the VoiceCommand for `text`, or None if nothing matches."""
+        text = " ".join(text.lower().split())
+        for pattern, name, arg in self.table:
+            if pattern.search(text):
+                return VoiceCommand(name, arg, text, time.time() if timestamp is None else timestamp)
+        return None
+
+
+class VoicePipeline:
+    """Audio source -> VAD -> recognizer -> command matcher -> `commands` queue, on one thread.
+
+    `vad_options` are EnergyVAD arguments; the VAD is created once the
+    source is open and its sample rate is known.
+    """
+
+    def __init__(self, source, recognizer, commands, matcher=None, vad_options=None):
+        self.source = source
+        self.recognizer = recognizer
+        self.commands = commands
+        self.matcher = matcher or CommandMatcher()
+        self.vad_options = dict(vad_options or {})
+        self.vad = None
+        self.transcripts = 0
+        self._running = False
+        self._thread = None
+
+    def _handle(self, segment, sample_rate):
+        metrics.VOICE_SEGMENTS.inc()
+        with metrics.INFERENCE_SECONDS.labels(model="speech").time():
+            text = self.recognizer.transcribe(segment, sample_rate)
+        if not text:
+            return
+        self.transcripts += 1
+        command = self.matcher.match(text)
+        print(f"Voice command: {text}" + (f" → {command.name}" if command else ""))
+        if command is not None:
+            try:
+                self.commands.put_nowait(command)
+            except queue.Full:
+                pass
+
+    def _run(self):
+        try:
+            self.source.open()
+        except Exception as e:
+            print(f"Voice recognition error: {e}")
+            self._running = False
+            return
+        self.vad = vad = EnergyVAD(self.source.sample_rate, **self.vad_options)
+        try:
+            while self._running:
+                chunk = self.source.read()
+                if not chunk:
+                    break
+                segment = vad.process(chunk)
+                if segment is not None:
+                    self._handle(segment, self.source.sample_rate)
+            # A file may end mid-phrase
+            segment = vad.flush()
+            if segment is not None:
+                self._handle(segment, self.source.sample_rate)
+        except Exception as e:
+            print(f"Voice recognition error: {e}")
+        finally:
+            self.source.close()
+            self._running = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="visiosense-voice", daemon=True)
+            self._thread.start()
+        return self
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stop(self):
+        self._running = False
+        self.join(timeout=2.0)
+        self._thread = None
+
+
+def create_voice_pipeline(voice_settings, commands):
+    """Build a VoicePipeline from a "voice" settings section; None if voice is off or unavailable."""
+    if not voice_settings["enabled"]:
+        return None
+    try:
+        if voice_settings["source"]:
+            source = WavFileSource(voice_settings["source"], realtime=True)
+        else:
+            source = MicrophoneSource()
+        recognizer = create_recognizer(voice_settings["backend"], voice_settings["model"])
+    except Exception as e:
+        print(f"⚠️  Voice commands not available: {e}")
+        return None
+    if recognizer is None:
+        return None
+    vad_options = {
+        "ratio": voice_settings["energy_ratio"],
+        "min_energy": voice_settings["min_energy"],
+        "hangover": voice_settings["hangover"],
+    }
+    return VoicePipeline(source, recognizer, commands, vad_options=vad_options)
@@ -0,0 +1,363 @@
+"""
+VisioSense - Whiteboard
+==================================================
+
+Resolution-independent whiteboard strokes and the ink layer composited
+over the camera frame.
+
+- StrokeStore keeps every stroke as rows of compact arrays (normalized
+  points, timestamps, stroke ids) with undo and redo, so a drawing can be
+  rendered at any resolution or exported as PNG/SVG.
+- WhiteboardLayer is a raster with dirty-region tracking: compositing
+  adds only the regions that contain ink onto the frame (in place) and
+  does nothing at all while the board is empty.
+- Whiteboard ties them together. New points are drawn incrementally into
+  a cached raster at overlay resolution; the raster is re-rendered only
+  after undo, redo or a resolution change.
+"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _touches(a, b, margin):
+    return (a[0] - margin <= b[2] and b[0] - margin <= a[2] and
+            a[1] - margin <= b[3] and b[1] - margin <= a[3])
+
+
+class WhiteboardLayer:
+    """A BGR ink canvas with dirty-region tracking.
+
+    Dirty regions are (x0, y0, x1, y1) rectangles, end-exclusive. Touching
+    regions are merged as strokes grow; once there are more than
+    `max_regions` they collapse into a single bounding box.
+    """
+
+    def __init__(self, shape, max_regions=8, merge_margin=16):
+        self.canvas = np.zeros(shape, dtype=np.uint8)
+        self.max_regions = max_regions
+        self.merge_margin = merge_margin
+        self.regions = []
+
+    @property
+    def shape(self):
+        return self.canvas.shape
+
+    @property
+    def empty(self):
+        return not self.regions
+
+    def mark_dirty(self, x0, y0, x1, y1):
+        """Add a rectangle to the dirty set, clipped to the canvas."""
+        h, w = self.canvas.shape[:2]
+        rect = (max(0, int(x0)), max(0, int(y0)), min(w, int(x1)), min(h, int(y1)))
+        if rect[0] >= rect[2] or rect[1] >= rect[3]:
+            return
+
+        # Merge with every region it touches (usually the stroke's own region)
+        remaining = []
+        for region in self.regions:
+            if _touches(region, rect, self.merge_margin):
+                rect = _union(region, rect)
+            else:
+                remaining.append(region)
+        remaining.append(rect)
+
+        if len(remaining) > self.max_regions:
+            bounds = remaining[0]
+            for region in remaining[1:]:
+                bounds = _union(bounds, region)
+            remaining = [bounds]
+        self.regions = remaining
+
+    def line(self, p0, p1, color, thickness):
+        """Draw a line segment and mark its bounding box dirty."""
+        cv2.line(self.canvas, p0, p1, color, thickness)
+        pad = thickness // 2 + 2
+        self.mark_dirty(min(p0[0], p1[0]) - pad, min(p0[1], p1[1]) - pad,
+                        max(p0[0], p1[0]) + pad + 1, max(p0[1], p1[1]) + pad + 1)
+
+    def composite(self, frame):
+        """Add the ink onto `frame` in place (only dirty regions) and return it."""
+        for x0, y0, x1, y1 in self.regions:
+            roi = frame[y0:y1, x0:x1]
+            cv2.add(roi, self.canvas[y0:y1, x0:x1], dst=roi)
+        return frame
+
+    def clear(self):
+        """Erase all ink, touching only the dirty regions."""
+        for x0, y0, x1, y1 in self.regions:
+            self.canvas[y0:y1, x0:x1] = 0
+        self.regions = []
+
+
+class StrokeStore:
+    """Append-only stroke points with undo and redo.
+
+    Points are stored normalized to [0, 1] so strokes render at any size.
+    Stroke widths are a fraction of the target height. Undone strokes stay
+    in the arrays until a new stroke replaces them.
+    """
+
+    def __init__(self, capacity=4096):
+        self._points = np.empty((capacity, 2), dtype=np.float32)
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._stroke_ids = np.empty(capacity, dtype=np.int32)
+        self._size = 0
+        # Per stroke: [start, end, color, width]; `end` grows while the stroke is open
+        self._strokes = []
+        self._visible = 0
+        self._open = False
+
+    def __len__(self):
+        """Number of visible strokes."""
+        return self._visible
+
+    @property
+    def drawing(self):
+        return self._open
+
+    @property
+    def can_undo(self):
+        return self._visible > 0
+
+    @property
+    def can_redo(self):
+        return self._visible < len(self._strokes)
+
+    def _grow(self):
+        capacity = len(self._points) * 2
+        self._points = np.resize(self._points, (capacity, 2))
+        self._timestamps = np.resize(self._timestamps, capacity)
+        self._stroke_ids = np.resize(self._stroke_ids, capacity)
+
+    def begin(self, color, width):
+        """Start a new stroke; this discards any strokes that could be redone."""
+        self.end()
+        if self.can_redo:
+            self._size = self._strokes[self._visible][0]
+            del self._strokes[self._visible:]
+        self._strokes.append([self._size, self._size, tuple(color), float(width)])
+        self._visible = len(self._strokes)
+        self._open = True
+        return self._visible - 1
+
+    def add_point(self, x, y, timestamp=None):
+        """Append a normalized point to the open stroke."""
+        if not self._open:
+            raise RuntimeError("No open stroke; call begin() first")
+        if self._size == len(self._points):
+            self._grow()
+        index = self._size
+        self._points[index] = (x, y)
+        self._timestamps[index] = time.time() if timestamp is None else timestamp
+        self._stroke_ids[index] = len(self._strokes) - 1
+        self._size += 1
+        self._strokes[-1][1] = self._size
+
+    def end(self):
+        """Finish the open stroke (dropping it if it has no points)."""
+        if self._open:
+            self._open = False
+            start, end = self._strokes[-1][:2]
+            if start == end:
+                self._strokes.pop()
+                self._visible = len(self._strokes)
+
+    def undo(self):
+        self.end()
+        if not self.can_undo:
+            return False
+        self._visible -= 1
+        return True
+
+    def redo(self):
+        if not self.can_redo:
+            return False
+        self._visible += 1
+        return True
+
+    def clear(self):
+        """Hide every stroke; redo brings them back one by one."""
+        self.end()
+        self._visible = 0
+
+    def strokes(self):
+        """Yield (points, color, width) for every visible stroke."""
+        for start, end, color, width in self._strokes[:self._visible]:
+            yield self._points[start:end], color, width
+
+    @property
+    def points(self):
+        """Points, timestamps and stroke ids of the visible strokes."""
+        end = self._strokes[self._visible - 1][1] if self._visible else 0
+        return self._points[:end], self._timestamps[:end], self._stroke_ids[:end]
+
+
+def _to_pixels(points, width, height):
+    return np.rint(points * (width - 1, height - 1)).astype(np.int32)
+
+
+def fit_box(width, height, aspect):
+    """(x, y, width, height) of the largest `aspect` (width / height) box centered in width x height."""
+    if aspect is None:
+        return 0, 0, width, height
+    box_width, box_height = width, height
+    if width / height > aspect:
+        box_width = max(1, int(round(height * aspect)))
+    else:
+        box_height = max(1, int(round(width / aspect)))
+    return (width - box_width) // 2, (height - box_height) // 2, box_width, box_height
+
+
+def render_strokes(store, layer, aspect=None):
+    """Rasterize every visible stroke of `store` into `layer`.
+
+    With `aspect`, the normalized canvas keeps that width / height ratio and
+    is centered in the layer instead of being stretched to fill it.
+    """
+    x0, y0, width, height = fit_box(layer.shape[1], layer.shape[0], aspect)
+    for points, color, stroke_width in store.strokes():
+        pixels = _to_pixels(points, width, height) + (x0, y0)
+        thickness = max(1, int(round(stroke_width * height)))
+        if len(pixels) == 1:
+            pixels = np.repeat(pixels, 2, axis=0)
+        for p0, p1 in zip(pixels[:-1].tolist(), pixels[1:].tolist()):
+            layer.line(tuple(p0), tuple(p1), color, thickness)
+
+
+def strokes_to_svg(store, width, height, background=None, aspect=None):
+    """Return the visible strokes as an SVG document of the given size (see render_strokes for `aspect`)."""
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}">']
+    if background is not None:
+        b, g, r = background
+        parts.append(f'<rect width="100%" height="100%" fill="rgb({r},{g},{b})"/>')
+    x0, y0, box_width, box_height = fit_box(width, height, aspect)
+    for points, (b, g, r), stroke_width in store.strokes():
+        coords = " ".join(f"{x:.1f},{y:.1f}"
+                          for x, y in (points * (box_width - 1, box_height - 1) + (x0, y0)).tolist())
+        parts.append(f'<polyline points="{coords}" fill="none" stroke="rgb({r},{g},{b})" '
+                     f'stroke-width="{stroke_width * box_height:.1f}" '
+                     f'stroke-linecap="round" stroke-linejoin="round"/>')
+    parts.append('</svg>')
+    return "\n".join(parts)
+
+
+class Whiteboard:
+    """Stroke store plus a cached overlay raster.
+
+    Points are normalized (x, y) in [0, 1]. `width` is the stroke width as a
+    fraction of the frame height (8 px at 480p by default). `aspect` is the
+    width / height of the frames drawn on (taken from the overlay), so
+    exports of any size keep the drawing's proportions. All methods are
+    thread-safe, so the web UI can undo or export while the engine draws.
+    """
+
+    def __init__(self, color=(0, 0, 255), width=8 / 480):
+        self.color = color
+        self.width = width
+        self.store = StrokeStore()
+        self._layer = None
+        self._stale = False
+        self._last_pixel = None
+        self.aspect = 4 / 3
+        self._lock = threading.RLock()
+
+    def draw_to(self, x, y, timestamp=None):
+        """Extend the current stroke to (x, y), starting a new one if needed."""
+        with self._lock:
+            self._draw_to(x, y, timestamp)
+
+    def _draw_to(self, x, y, timestamp):
+        if not self.store.drawing:
+            self.store.begin(self.color, self.width)
+            self._last_pixel = None
+        self.store.add_point(x, y, timestamp)
+
+        # Keep the cached raster current without re-rendering everything
+        if self._layer is not None and not self._stale:
+            height, width = self._layer.shape[:2]
+            pixel = tuple(_to_pixels(np.array([(x, y)], dtype=np.float32), width, height)[0].tolist())
+            thickness = max(1, int(round(self.width * height)))
+            self._layer.line(self._last_pixel or pixel, pixel, self.color, thickness)
+            self._last_pixel = pixel
+
+    def lift(self):
+        """End the current stroke."""
+        with self._lock:
+            self.store.end()
+            self._last_pixel = None
+
+    def undo(self):
+        with self._lock:
+            changed = self.store.undo()
+            self._stale = self._stale or changed
+            return changed
+
+    def redo(self):
+        with self._lock:
+            changed = self.store.redo()
+            self._stale = self._stale or changed
+            return changed
+
+    def clear(self):
+        with self._lock:
+            self.store.clear()
+            self._last_pixel = None
+            if self._layer is not None:
+                self._layer.clear()
+
+    def layer(self, shape):
+        """Return the ink raster for `shape`, re-rendering only when needed."""
+        with self._lock:
+            return self._render_layer(shape)
+
+    def _render_layer(self, shape):
+        if self._layer is None or self._layer.shape != shape:
+            self._layer = WhiteboardLayer(shape)
+            self.aspect = shape[1] / shape[0]
+            self._stale = True
+        if self._stale:
+            self._layer.clear()
+            render_strokes(self.store, self._layer)
+            self._stale = False
+            self._last_pixel = None
+            if self.store.drawing:
+                # Continue the open stroke from its last rendered point
+                height, width = shape[:2]
+                self._last_pixel = tuple(_to_pixels(self.store.points[0][-1:], width, height)[0].tolist())
+        return self._layer
+
+    def composite(self, frame):
+        """Add the ink onto `frame` in place and return it."""
+        with self._lock:
+            return self._render_layer(frame.shape).composite(frame)
+
+    def render(self, width, height, background=(255, 255, 255)):
+        """Render the strokes to a new BGR image of any size."""
+        layer = WhiteboardLayer((height, width, 3))
+        with self._lock:
+            render_strokes(self.store, layer, self.aspect)
+        if background is None:
+            return layer.canvas
+        image = np.empty_like(layer.canvas)
+        image[:] = background
+        # Ink replaces the background wherever it was drawn
+        mask = layer.canvas.any(axis=2)
+        image[mask] = layer.canvas[mask]
+        return image
+
+    def save_png(self, path, width=1920, height=1080, background=(255, 255, 255)):
+        return cv2.imwrite(path, self.render(width, height, background))
+
+    def to_svg(self, width=1920, height=1080, background=(255, 255, 255)):
+        with self._lock:
+            return strokes_to_svg(self.store, width, height, background, self.aspect)